@@ -0,0 +1,155 @@
+from django.conf import settings
+from django.db import transaction
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (
+    AuthenticationFailed,
+    InvalidToken,
+)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from users.models import User
+
+from .cache import get_cache, get_generations
+
+USER_KEY = 'api:user:{}:{}'
+TOKEN_VERSION_KEY = 'api:token_version:{}'
+# User attributes copied into access tokens for TOKEN_CLAIMS_AUTH.
+USER_CLAIMS = ('username', 'role', 'is_staff', 'is_superuser')
+VERSION_CLAIM = 'token_version'
+
+
+def get_user_namespace(user_id):
+    return f'user:{user_id}'
+
+
+def get_token_version(user_id):
+    """Returns the token version of the user, None for a deleted user.
+
+    The version is stored on the user row, the cache only saves the
+    query: a missing key is read again from the database.
+    """
+    key = TOKEN_VERSION_KEY.format(user_id)
+    version = get_cache().get(key)
+    if version is None:
+        version = User.objects.filter(pk=user_id).values_list(
+            'token_version', flat=True).first()
+        # -1 remembers a deleted user, no token matches it.
+        version = -1 if version is None else version
+        get_cache().set(key, version, timeout=settings.USER_CACHE_TIMEOUT)
+    return None if version < 0 else version
+
+
+def forget_token_version(user_id):
+    """Drops the cached version once the new one is committed."""
+    key = TOKEN_VERSION_KEY.format(user_id)
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def get_access_token(refresh, user):
+    """Access token of the refresh token with the current user claims."""
+    access = refresh.access_token
+    for claim in USER_CLAIMS:
+        access[claim] = getattr(user, claim)
+    access[VERSION_CLAIM] = user.token_version
+    # The user row is at hand, requests with the token skip the query.
+    get_cache().add(
+        TOKEN_VERSION_KEY.format(user.pk), user.token_version,
+        timeout=settings.USER_CACHE_TIMEOUT)
+    return access
+
+
+def get_author(request):
+    """User to set as the author of new rows, without a query."""
+    if isinstance(request.user, ClaimsUser):
+        return request.user.to_user()
+    return request.user
+
+
+def get_request_user(request):
+    """User row of the request, loaded when only token claims are known."""
+    if isinstance(request.user, ClaimsUser):
+        return User.objects.get(pk=request.user.pk)
+    return request.user
+
+
+def get_user(user_id):
+    """Returns the user by id, or None, caching it for a short time.
+
+    The key includes the generation of the user namespace, bumped when
+    the user is saved, so a role change is seen by the next request.
+    """
+    generation, = get_generations([get_user_namespace(user_id)])
+    key = USER_KEY.format(user_id, generation)
+    user = get_cache().get(key)
+    if user is None:
+        user = User.objects.filter(pk=user_id).first()
+        if user is not None:
+            get_cache().set(key, user, timeout=settings.USER_CACHE_TIMEOUT)
+    return user
+
+
+class ClaimsUser(TokenUser):
+    """User built from access token claims, without a query."""
+
+    ADMIN = User.ADMIN
+    MODERATOR = User.MODERATOR
+
+    @cached_property
+    def role(self):
+        return self.token.get('role', User.USER)
+
+    is_admin = User.is_admin
+    is_moderator = User.is_moderator
+
+    def to_user(self):
+        """Unsaved User holding the claims, enough to set and render."""
+        return User(pk=self.pk, **{
+            claim: getattr(self, claim) for claim in USER_CLAIMS})
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication reading the token user from the cache.
+
+    With TOKEN_CLAIMS_AUTH the user is built from the token claims
+    instead, unless the token version of the user was bumped after the
+    token was issued: such a token is rejected and has to be refreshed.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            return super().get_user(validated_token)
+
+        if settings.TOKEN_CLAIMS_AUTH and VERSION_CLAIM in validated_token:
+            if validated_token[VERSION_CLAIM] != get_token_version(user_id):
+                raise AuthenticationFailed(
+                    'Права пользователя изменились, обновите токен',
+                    code='token_revoked')
+            return ClaimsUser(validated_token)
+
+        user = get_user(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                _('User not found'), code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _('User is inactive'), code='user_inactive')
+        return user
+
+
+def get_token_user_id(request):
+    """Returns the user id of a valid access token without any query."""
+    authentication = CachedJWTAuthentication()
+    header = authentication.get_header(request)
+    try:
+        # A malformed header fails here, such requests count as anonymous.
+        raw_token = header and authentication.get_raw_token(header)
+        if not raw_token:
+            return None
+        token = authentication.get_validated_token(raw_token)
+    except (AuthenticationFailed, InvalidToken):
+        return None
+    return token.get(api_settings.USER_ID_CLAIM)
@@ -1,23 +1,88 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.backends import ModelBackend
-from django.contrib.auth.tokens import default_token_generator
+from django.db import transaction
 from rest_framework import exceptions
-from users.models import User
+from users.models import ConfirmationCode, User
+
+from .authentication import get_user
+from .cache import get_cache
+
+UNKNOWN_USERNAME_KEY = 'api:unknown-username:{}'
+ATTEMPTS_KEY = 'api:code-attempts:{}'
+
+
+def get_username_digest(username):
+    # Usernames come from the request body, keys must stay cache safe.
+    return hashlib.md5(username.encode()).hexdigest()
+
+
+def forget_unknown_username(username):
+    """Drops the negative cache entry once a user with the name exists."""
+    key = UNKNOWN_USERNAME_KEY.format(get_username_digest(username))
+    transaction.on_commit(lambda: get_cache().delete(key))
+
+
+def reset_attempts(username):
+    get_cache().delete(ATTEMPTS_KEY.format(get_username_digest(username)))
+
+
+def add_attempt(username):
+    """Counts a wrong code, returns the number of failures so far."""
+    key = ATTEMPTS_KEY.format(get_username_digest(username))
+    cache = get_cache()
+    cache.add(key, 0, timeout=settings.CONFIRMATION_CODE_MINUTES * 60)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Expired between add and incr.
+        cache.set(key, 1, timeout=settings.CONFIRMATION_CODE_MINUTES * 60)
+        return 1
 
 
 class AuthBackend(ModelBackend):
-    """Provides token authentication."""
+    """Provides token authentication.
+
+    Unknown usernames and exhausted codes are rejected from the cache.
+    Otherwise the user and the code are read by one query on the unique
+    username index, a wrong code costs a cache increment.
+    """
 
     def authenticate(self, request, username=None, confirmation_code=None):
-        try:
-            user = User.objects.get(username=username)
-        except User.DoesNotExist:
+        if username is None or confirmation_code is None:
+            return None
+        digest = get_username_digest(username)
+        unknown_key = UNKNOWN_USERNAME_KEY.format(digest)
+        attempts_key = ATTEMPTS_KEY.format(digest)
+        found = get_cache().get_many([unknown_key, attempts_key])
+        if unknown_key in found:
             raise exceptions.NotFound('Пользователь не найден')
-        if not default_token_generator.check_token(user, confirmation_code):
+        if found.get(attempts_key, 0) >= settings.CONFIRMATION_MAX_ATTEMPTS:
+            raise exceptions.PermissionDenied(
+                'Превышено число попыток, запросите новый код')
+
+        user = User.objects.select_related(
+            'confirmation_code').filter(username=username).first()
+        if user is None:
+            get_cache().set(unknown_key, True,
+                            timeout=settings.UNKNOWN_USERNAME_TIMEOUT)
+            raise exceptions.NotFound('Пользователь не найден')
+        try:
+            code = user.confirmation_code
+        except ConfirmationCode.DoesNotExist:
+            raise exceptions.ParseError('Запросите код подтверждения')
+        if code.is_expired:
+            raise exceptions.ParseError(
+                'Код подтверждения устарел, запросите новый')
+        if not code.check_code(confirmation_code):
+            if add_attempt(username) >= settings.CONFIRMATION_MAX_ATTEMPTS:
+                # The cache may be flushed, the burned code can not.
+                code.delete()
             raise exceptions.ParseError('Введен неправильный код потверждения')
+        code.delete()
+        reset_attempts(username)
         return user
 
     def get_user(self, user_id):
-        try:
-            return User.objects.get(pk=user_id)
-        except User.DoesNotExist:
-            return None
+        return get_user(user_id)
@@ -0,0 +1,149 @@
+import hashlib
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+GENERATION_KEY = 'api:generation:{}'
+ROOT_NAMESPACE = 'all'
+RESPONSE_KEY = 'api:response:{}:{}'
+RATING_PRIOR_KEY = 'api:rating-prior'
+
+stats = Counter()
+
+
+def get_cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def new_generation():
+    """Unique generation stamp starting with its time in microseconds."""
+    return f'{time.time_ns() // 1000:x}.{uuid.uuid4().hex[:6]}'
+
+
+def get_generation_time(generation):
+    """Unix time the generation was started."""
+    return int(generation.partition('.')[0], 16) / 10 ** 6
+
+
+def get_generations(namespaces):
+    """Returns current generation stamps of the namespaces, in order.
+
+    A missing stamp, e.g. after a cache restart, starts a new generation
+    instead of falling back to a constant, so keys and ETags built from
+    the lost one are never reused.
+    """
+    keys = [GENERATION_KEY.format(namespace) for namespace in namespaces]
+    found = get_cache().get_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            get_cache().add(key, new_generation(), timeout=None)
+        found.update(get_cache().get_many(missing))
+    return [found[key] for key in keys]
+
+
+async def aget_generations(namespaces):
+    keys = [GENERATION_KEY.format(namespace) for namespace in namespaces]
+    found = await get_cache().aget_many(keys)
+    missing = [key for key in keys if key not in found]
+    if missing:
+        for key in missing:
+            await get_cache().aadd(key, new_generation(), timeout=None)
+        found.update(await get_cache().aget_many(missing))
+    return [found[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """Bumps namespace generations once the current transaction commits.
+
+    Entries are never deleted one by one: a new generation changes every
+    key built from the namespace, and stale entries simply expire.
+    """
+    def bump():
+        get_cache().set_many({
+            GENERATION_KEY.format(namespace): new_generation()
+            for namespace in namespaces
+        }, timeout=None)
+
+    transaction.on_commit(bump)
+
+
+def invalidate_all():
+    """Invalidates every cached response, e.g. after bulk loading."""
+    invalidate(ROOT_NAMESPACE)
+
+
+def get_digest(request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    url = request.build_absolute_uri(request.path)
+    return hashlib.md5(f'{url}?{query}'.encode()).hexdigest()
+
+
+def make_key(request, namespaces):
+    generations = get_generations((ROOT_NAMESPACE, *namespaces))
+    return RESPONSE_KEY.format('.'.join(generations), get_digest(request))
+
+
+async def amake_key(request, namespaces):
+    generations = await aget_generations((ROOT_NAMESPACE, *namespaces))
+    return RESPONSE_KEY.format('.'.join(generations), get_digest(request))
+
+
+def get_response_data(key):
+    return get_cache().get(key)
+
+
+async def aget_response_data(key):
+    return await get_cache().aget(key)
+
+
+def set_response_data(key, data):
+    get_cache().set(key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+
+async def aset_response_data(key, data):
+    await get_cache().aset(
+        key, data, timeout=settings.RESPONSE_CACHE_TIMEOUT)
+
+
+def get_rating_prior():
+    """Mean score of all reviews, the prior of Bayesian ratings.
+
+    Cached for RATING_PRIOR_TIMEOUT: it moves slowly and takes a scan
+    of the title rating columns.
+    """
+    found = get_cache().get(RATING_PRIOR_KEY)
+    if found is not None:
+        return found['mean']
+    return refresh_rating_prior()
+
+
+def refresh_rating_prior():
+    # Imported here: the pooled database backend imports this module
+    # through the metrics before the models can be loaded.
+    from titles.models import Title
+
+    mean = Title.objects.get_mean_score()
+    get_cache().set(RATING_PRIOR_KEY, {'mean': mean},
+                    timeout=settings.RATING_PRIOR_TIMEOUT)
+    return mean
+
+
+def record(namespace, hit):
+    stats[(namespace, 'hit' if hit else 'miss')] += 1
+
+
+def get_stats():
+    """Returns in-process hit/miss counters and ratio per namespace."""
+    result = {}
+    for (namespace, outcome), value in sorted(stats.items()):
+        result.setdefault(namespace, {'hit': 0, 'miss': 0})[outcome] = value
+    for counters in result.values():
+        total = counters['hit'] + counters['miss']
+        counters['ratio'] = counters['hit'] / total if total else 0.0
+    return result
@@ -0,0 +1,84 @@
+import math
+import threading
+from collections import defaultdict
+
+from .cache import get_stats
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, math.inf)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, math.inf)
+
+HISTOGRAMS = {
+    'api_request_duration_seconds': ('Total request time.', BUCKETS),
+    'api_request_db_seconds': ('Time spent in SQL queries.', BUCKETS),
+    'api_request_render_seconds': ('Time spent rendering the response.',
+                                   BUCKETS),
+    'api_request_queries': ('SQL queries per request.', QUERY_BUCKETS),
+}
+
+
+class Histogram:
+    """Cumulative Prometheus-style histogram of observed values."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+
+    def render(self, name, label):
+        """Returns bucket, sum and count lines for one label set."""
+        lines = []
+        for bound, count in zip(self.buckets, self.counts):
+            le = '+Inf' if bound == math.inf else bound
+            lines.append(f'{name}_bucket{{{label},le="{le}"}} {count}')
+        return lines + [f'{name}_sum{{{label}}} {self.sum}',
+                        f'{name}_count{{{label}}} {self.count}']
+
+
+class Registry:
+    """In-process histograms labelled by route, safe across threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = defaultdict(dict)
+
+    def observe(self, route, **values):
+        with self.lock:
+            for name, value in values.items():
+                histograms = self.histograms[name]
+                if route not in histograms:
+                    histograms[route] = Histogram(HISTOGRAMS[name][1])
+                histograms[route].observe(value)
+
+    def clear(self):
+        with self.lock:
+            self.histograms.clear()
+
+    def render(self):
+        """Returns histograms and cache counters in Prometheus text format."""
+        lines = []
+        with self.lock:
+            for name, (description, _) in HISTOGRAMS.items():
+                lines += [f'# HELP {name} {description}',
+                          f'# TYPE {name} histogram']
+                for route, histogram in sorted(
+                        self.histograms[name].items()):
+                    lines += histogram.render(name, f'route="{route}"')
+        lines += ['# HELP api_cache_requests_total Response cache lookups.',
+                  '# TYPE api_cache_requests_total counter']
+        for namespace, counters in get_stats().items():
+            for outcome in ('hit', 'miss'):
+                lines.append(
+                    f'api_cache_requests_total{{namespace="{namespace}",'
+                    f'outcome="{outcome}"}} {counters[outcome]}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
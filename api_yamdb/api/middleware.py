@@ -0,0 +1,203 @@
+import re
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+
+from .authentication import get_token_user_id
+from .metrics import registry
+from .routers import (
+    choose_replica,
+    is_pinned_to_primary,
+    pin_to_primary,
+    read_database,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+
+
+class QueryTimer:
+    """Execute wrapper counting queries and their total duration."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class RequestMetricsMiddleware:
+    """Records query count, DB, render and total time per route.
+
+    Timings go to the Server-Timing header and to the in-process
+    histograms served by the metrics endpoint.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        request._render_time = 0.0
+        start = time.perf_counter()
+        with self.timed_queries(timer):
+            response = self.get_response(request)
+        return self.record(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        request._render_time = 0.0
+        start = time.perf_counter()
+        with self.timed_queries(timer):
+            response = await self.get_response(request)
+        return self.record(request, response, timer, start)
+
+    def timed_queries(self, timer):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(timer))
+        return stack
+
+    def record(self, request, response, timer, start):
+        total = time.perf_counter() - start
+        match = request.resolver_match
+        if match is None or not match.url_name:
+            return response
+        registry.observe(
+            match.view_name,
+            api_request_duration_seconds=total,
+            api_request_db_seconds=timer.duration,
+            api_request_render_seconds=request._render_time,
+            api_request_queries=timer.count,
+        )
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = ', '.join((
+                f'db;desc="{timer.count} queries";'
+                f'dur={timer.duration * 1000:.1f}',
+                f'render;dur={request._render_time * 1000:.1f}',
+                f'total;dur={total * 1000:.1f}',
+            ))
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook returns.
+        start = time.perf_counter()
+
+        def stop(response):
+            request._render_time += time.perf_counter() - start
+
+        response.add_post_render_callback(stop)
+        return response
+
+
+class ReplicaMiddleware:
+    """Lets safe requests read from a replica, with read-your-writes.
+
+    After a successful write the user reads from the primary for
+    REPLICA_STICKY_SECONDS, so replica lag never hides their changes.
+    """
+
+    sync_capable = True
+    async_capable = True
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = read_database.set(self.get_read_database(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            read_database.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = read_database.set(self.get_read_database(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            read_database.reset(token)
+        self.pin_writer(request, response)
+        return response
+
+    def get_read_database(self, request):
+        if request.method not in self.safe_methods:
+            return None
+        replica = choose_replica()
+        if replica is None:
+            return None
+        user_id = get_token_user_id(request)
+        if user_id is not None and is_pinned_to_primary(user_id):
+            return None
+        return replica
+
+    def pin_writer(self, request, response):
+        user = getattr(request, 'user', None)
+        if (request.method not in self.safe_methods
+                and response.status_code < 400
+                and settings.DATABASE_REPLICAS
+                and user is not None and user.is_authenticated):
+            pin_to_primary(user.pk)
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Compresses responses with brotli if the client accepts it, else gzip.
+
+    Brotli needs the optional Brotli package and is used for regular
+    responses only, streamed exports stay with gzip.
+    """
+
+    def __init__(self, get_response):
+        if not settings.RESPONSE_COMPRESSION:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_response(self, request, response):
+        if (brotli is None or response.streaming
+                or response.has_header('Content-Encoding')
+                or not ACCEPTS_BROTLI.search(
+                    request.META.get('HTTP_ACCEPT_ENCODING', ''))):
+            return super().process_response(request, response)
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if len(response.content) < 200:
+            return response
+        compressed = brotli.compress(
+            response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
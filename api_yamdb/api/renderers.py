@@ -0,0 +1,29 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer producing the same compact bytes through orjson.
+
+    Values orjson does not know, and datetimes, go through the DRF
+    encoder so their format does not change. Indented output for the
+    browsable API stays with the standard renderer.
+    """
+
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (self.get_indent(accepted_media_type, renderer_context or {})
+                or self.ensure_ascii or not self.compact):
+            return super().render(
+                data, accepted_media_type, renderer_context)
+        ret = orjson.dumps(data, default=self.encoder.default, option=OPTIONS)
+        # Same escaping as JSONRenderer for JavaScript compatibility.
+        return ret.replace(
+            '\u2028'.encode(), b'\\u2028'
+        ).replace('\u2029'.encode(), b'\\u2029')
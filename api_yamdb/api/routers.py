@@ -0,0 +1,49 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from .cache import get_cache
+
+PRIMARY_KEY = 'api:primary:{}'
+
+read_database = ContextVar('read_database', default=None)
+
+
+def choose_replica():
+    """Returns a random replica alias, None without replicas."""
+    replicas = settings.DATABASE_REPLICAS
+    return random.choice(replicas) if replicas else None
+
+
+def pin_to_primary(user_id):
+    """Sends reads of the user to the primary for a while after a write."""
+    get_cache().set(PRIMARY_KEY.format(user_id), True,
+                    timeout=settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user_id):
+    return bool(get_cache().get(PRIMARY_KEY.format(user_id)))
+
+
+class ReplicaRouter:
+    """Routes reads to the replica chosen for the current request.
+
+    Only safe requests choose a replica (see ReplicaMiddleware), so
+    writes, reads inside write requests and code outside requests use
+    the primary. One replica serves the whole request, which keeps its
+    reads consistent with each other.
+    """
+
+    def db_for_read(self, model, **hints):
+        return read_database.get() or 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
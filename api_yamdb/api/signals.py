@@ -0,0 +1,107 @@
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_save,
+)
+from django.db.models import F
+from django.dispatch import receiver
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, GenreTitle, Title
+from users.models import User
+
+from .authentication import (
+    USER_CLAIMS,
+    forget_token_version,
+    get_user_namespace,
+)
+from .backends import forget_unknown_username
+from .cache import invalidate
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Genre)
+def invalidate_genre(sender, **kwargs):
+    invalidate('genre')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, **kwargs):
+    invalidate('category')
+
+
+@receiver(post_save, sender=Title)
+@receiver(post_delete, sender=Title)
+def invalidate_title(sender, instance, **kwargs):
+    invalidate('title', f'title:{instance.pk}')
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_related_title(sender, instance, **kwargs):
+    # Genres and rating are part of the title representation.
+    invalidate('title', f'title:{instance.title_id}')
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_reviews(sender, instance, **kwargs):
+    invalidate(f'reviews:{instance.title_id}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comments(sender, instance, **kwargs):
+    invalidate(f'comments:{instance.review_id}')
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def invalidate_title_genres(sender, instance, action, reverse, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        # Every title representation depends on the genre namespace.
+        invalidate('genre')
+    else:
+        invalidate('title', f'title:{instance.pk}')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user(sender, instance, **kwargs):
+    # Role and activity are read from the cached authenticated user.
+    invalidate(get_user_namespace(instance.pk))
+
+
+@receiver(post_save, sender=User)
+def forget_negative_username(sender, instance, **kwargs):
+    # Token requests for the name were answered from the cache.
+    forget_unknown_username(instance.username)
+
+
+@receiver(pre_save, sender=User)
+def revoke_stale_claims(sender, instance, **kwargs):
+    # Access tokens carry the claims, they stop working once those change.
+    if instance.pk is None:
+        return
+    fields = (*USER_CLAIMS, 'is_active')
+    saved = User.objects.filter(pk=instance.pk).values(
+        *fields, 'token_version').first()
+    if saved and any(saved[name] != getattr(instance, name)
+                     for name in fields):
+        # Stored by a query as the save may not list the field.
+        User.objects.filter(pk=instance.pk).update(
+            token_version=F('token_version') + 1)
+        instance.token_version = saved['token_version'] + 1
+        forget_token_version(instance.pk)
+    if saved and saved['username'] != instance.username:
+        # Reviews and comments are shown with the username.
+        invalidate('author')
+
+
+@receiver(post_delete, sender=User)
+def revoke_deleted_user_claims(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
@@ -0,0 +1,118 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+WINDOW_KEY = 'api:throttle:{}:{}:{}'
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def get_cache():
+    return caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+def parse_rate(rate):
+    """Returns the size and period of a '<size>/<period>' window."""
+    size, period = rate.split('/')
+    return int(size), PERIODS[period[0]]
+
+
+def count_request(key, size, period, now=None):
+    """Counts a request in the current window, returns seconds to wait or 0.
+
+    A client gets `size` requests per fixed window of `period` seconds.
+    The counter is created by add and bumped by incr, both atomic in
+    Redis and Memcached, so concurrent workers never lose a request.
+    """
+    now = time.time() if now is None else now
+    window = int(now // period)
+    key = WINDOW_KEY.format(key, period, window)
+    cache = get_cache()
+    if cache.add(key, 1, timeout=period + 1):
+        return 0
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Evicted between add and incr, the request opens the window.
+        cache.add(key, 1, timeout=period + 1)
+        return 0
+    if count <= size:
+        return 0
+    return (window + 1) * period - now
+
+
+class CacheRateThrottle(BaseThrottle):
+    """Request counter per client, shared by workers through the cache.
+
+    Rates come from THROTTLE_RATES by `get_scope`, a scope without
+    a rate is not throttled. Clients are told when to retry by the
+    Retry-After header DRF builds from `wait`.
+    """
+
+    scope = None
+    methods = None
+
+    def get_scope(self, request, view):
+        return self.scope
+
+    def get_ident_key(self, request, view):
+        """Identifies the client, by the user or by the address."""
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            return f'user:{user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.delay = 0
+        if self.methods is not None and request.method not in self.methods:
+            return True
+        scope = self.get_scope(request, view)
+        rate = settings.THROTTLE_RATES.get(scope)
+        ident = rate and self.get_ident_key(request, view)
+        if not ident:
+            return True
+        self.delay = count_request(f'{scope}:{ident}', *parse_rate(rate))
+        return not self.delay
+
+    def wait(self):
+        return self.delay
+
+
+class AuthThrottle(CacheRateThrottle):
+    """Limits signup and token requests per address."""
+
+    scope = 'auth'
+
+    def get_ident_key(self, request, view):
+        return f'ip:{self.get_ident(request)}'
+
+
+class ConfirmationThrottle(CacheRateThrottle):
+    """Limits confirmation emails per username, whatever the address."""
+
+    scope = 'confirmation'
+    methods = ('POST',)
+
+    def get_ident_key(self, request, view):
+        data = request.data
+        username = data.get('username') if isinstance(data, dict) else None
+        if not isinstance(username, str):
+            return None
+        return f'username:{username.lower()}'
+
+
+class WriteThrottle(CacheRateThrottle):
+    """Limits unsafe requests per user in the scope of the view.
+
+    Admins share the generous `admin` scope, other users the
+    `throttle_scope` of the view, `write` by default.
+    """
+
+    methods = ('POST', 'PUT', 'PATCH', 'DELETE')
+
+    def get_scope(self, request, view):
+        user = getattr(request, 'user', None)
+        if getattr(user, 'is_admin', False):
+            return 'admin'
+        return getattr(view, 'throttle_scope', 'write')
@@ -1,17 +1,20 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
 from django_filters.rest_framework import CharFilter, FilterSet, NumberFilter
 from titles.models import Title
 
+SEARCH_QUERY_SQL = "plainto_tsquery('pg_catalog.russian', %s)"
+
 
 class TitleFilter(FilterSet):
     """"Django backend filter for title model."""
 
     genre = CharFilter(
         field_name='genre__slug',
-        lookup_expr='icontains'
     )
     category = CharFilter(
         field_name='category__slug',
-        lookup_expr='icontains'
     )
     name = CharFilter(
         field_name='name',
@@ -20,7 +23,29 @@ class TitleFilter(FilterSet):
     year = NumberFilter(
         field_name='year',
     )
+    search = CharFilter(
+        method='filter_search'
+    )
 
     class Meta:
         model = Title
-        fields = '__all__'
+        fields = ('genre', 'category', 'name', 'year')
+
+    def filter_search(self, queryset, name, value):
+        """Full-text search over name and description ranked by relevance.
+
+        On PostgreSQL it uses the GIN indexed `search_vector` column
+        maintained by a trigger, other backends fall back to LIKE.
+        """
+        if connections[queryset.db].vendor != 'postgresql':
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value))
+        return queryset.extra(
+            where=[f'titles_title.search_vector @@ {SEARCH_QUERY_SQL}'],
+            params=[value],
+        ).annotate(
+            search_rank=RawSQL(
+                f'ts_rank(titles_title.search_vector, {SEARCH_QUERY_SQL})',
+                (value,)
+            )
+        ).order_by('-search_rank', 'id')
@@ -0,0 +1,386 @@
+import functools
+import hashlib
+
+from api import cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import serializers, status
+from rest_framework.response import Response
+
+
+def _unwrap(field):
+    """Returns the item field of a many field."""
+    if isinstance(field, serializers.ListSerializer):
+        return field.child
+    if isinstance(field, serializers.ManyRelatedField):
+        return field.child_relation
+    return field
+
+
+def _relation_columns(field, lookup):
+    """Columns of a joined relation rendered by `field`, None if unknown."""
+    if isinstance(field, serializers.SlugRelatedField):
+        return [lookup, f'{lookup}__{field.slug_field}']
+    if isinstance(field, serializers.BaseSerializer):
+        # Nested fields add their own columns.
+        return [lookup]
+    return [lookup, None]
+
+
+def _prefetch(lookup, model_field, ordering):
+    """Prefetch lookup, with an ordered queryset when `ordering` is set."""
+    if not ordering:
+        return lookup
+    return Prefetch(
+        lookup, model_field.related_model.objects.order_by(*ordering))
+
+
+def _plan_fields(model, serializer, prefix, select, prefetch, columns,
+                 in_prefetch):
+    """Collects relation lookups needed to render serializer fields.
+
+    Columns of the main queryset are collected into `columns` unless it
+    is None; None is appended for a field that can not be mapped.
+    """
+    meta = getattr(serializer, 'Meta', None)
+    sources = getattr(meta, 'column_sources', {})
+    orderings = getattr(meta, 'prefetch_ordering', {})
+    found = []
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+        name = field.source.split('.')[0]
+        lookup = f'{prefix}{name}'
+        try:
+            model_field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            found.extend(
+                [f'{prefix}{source}' for source in sources[name]]
+                if name in sources else [None])
+            continue
+        if not model_field.is_relation:
+            found.append(lookup)
+            continue
+        many = model_field.many_to_many or model_field.one_to_many
+        field = _unwrap(field)
+        if (isinstance(field, serializers.PrimaryKeyRelatedField)
+                and not many):
+            # Rendered from the `<name>_id` column, no join needed.
+            found.append(lookup)
+            continue
+        if many or in_prefetch:
+            prefetch.append(
+                _prefetch(lookup, model_field, orderings.get(name)))
+        else:
+            select.append(lookup)
+            found.extend(_relation_columns(field, lookup))
+        if isinstance(field, serializers.BaseSerializer):
+            _plan_fields(
+                model_field.related_model, field, f'{lookup}__',
+                select, prefetch, None if many else found,
+                in_prefetch or many)
+    if columns is not None:
+        columns.extend(found)
+
+
+def plan_queryset(queryset, serializer, only=False, extra_columns=()):
+    """Applies select_related/prefetch_related matching serializer fields.
+
+    With `only` the queryset also loads just the columns the fields
+    render, plus `extra_columns`.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    select, prefetch, columns = [], [], [] if only else None
+    _plan_fields(
+        queryset.model, serializer, '', select, prefetch, columns, False)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+    if columns is not None and None not in columns:
+        queryset = queryset.only(*columns, *extra_columns)
+    return queryset
+
+
+def get_sparse_fields(request, query_param='fields'):
+    """Parses `?fields=id,name` of a GET request, None without it."""
+    if request is None or request.method != 'GET':
+        return None
+    value = request.query_params.get(query_param)
+    if not value:
+        return None
+    return [name for name in map(str.strip, value.split(',')) if name]
+
+
+def trim_fields(serializer, names):
+    """Drops serializer fields missing from `names`."""
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    unknown = [name for name in names if name not in serializer.fields]
+    if unknown:
+        raise serializers.ValidationError(
+            {'fields': [f'Неизвестные поля: {", ".join(unknown)}']})
+    for name in list(serializer.fields):
+        if name not in names:
+            serializer.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """Renders only the fields listed in `?fields=` on GET requests."""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = get_sparse_fields(self.request)
+        if names:
+            trim_fields(serializer, names)
+        return serializer
+
+
+class ValuesListMixin:
+    """Serves GET lists through `values_serializer_class`.
+
+    Rows are read with `.values()` and rendered without building model
+    instances, the regular serializer still decides the fields.
+    """
+
+    values_serializer_class = None
+
+    def list(self, request, *args, **kwargs):
+        if (self.values_serializer_class is None
+                or not settings.VALUES_SERIALIZERS):
+            return super().list(request, *args, **kwargs)
+        ordering = getattr(self, 'cursor_ordering', ())
+        serializer = self.values_serializer_class(
+            self.get_serializer(),
+            extra_columns=[name.lstrip('-') for name in ordering]
+        )
+        queryset = serializer.get_queryset(
+            self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(
+                serializer.to_representation(page))
+        return Response(serializer.to_representation(queryset))
+
+
+class QueryPlanMixin:
+    """Plans the queryset joins from the active serializer.
+
+    For a sparse fieldset only the columns of the requested fields and
+    of the cursor ordering are loaded.
+    """
+
+    def get_queryset(self):
+        ordering = getattr(self, 'cursor_ordering', ())
+        return plan_queryset(
+            super().get_queryset(),
+            self.get_serializer(),
+            only=bool(get_sparse_fields(self.request)),
+            extra_columns=[name.lstrip('-') for name in ordering]
+        )
+
+
+def is_not_modified(request, etag, last_modified):
+    """Evaluates If-None-Match, or If-Modified-Since without it.
+
+    `*` needs to know whether the object exists, it is checked once the
+    response is rendered.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        return etag.removeprefix('W/') in etags
+    since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE'))
+    return since is not None and int(last_modified) <= since
+
+
+class ConditionalResponseMixin:
+    """Answers GET list and retrieve with 304 when nothing changed.
+
+    Validators are built from the cache generations of the namespaces
+    the representation depends on, the ones signals bump on changes,
+    so they cost no query and an unchanged page is not even read.
+    """
+
+    def list(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aget_conditional_response(
+            super().alist, request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await self.aget_conditional_response(
+            super().aretrieve, request, *args, **kwargs)
+
+    def get_conditional_namespaces(self):
+        """Namespaces of the response cache, by default."""
+        namespace = self.cache_namespace
+        if self.action == 'retrieve':
+            namespace = f'{namespace}:{self.kwargs[self.lookup_field]}'
+        return (namespace, *self.cache_depends_on)
+
+    def get_validators(self, request, generations):
+        """Returns (etag, last_modified) of the generations."""
+        # The URL and the Accept header select the representation.
+        source = ';'.join([
+            cache.get_digest(request), request.META.get('HTTP_ACCEPT', ''),
+            *generations
+        ])
+        etag = f'W/"{hashlib.md5(source.encode()).hexdigest()}"'
+        last_modified = max(map(cache.get_generation_time, generations))
+        return etag, last_modified
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        generations = cache.get_generations(
+            (cache.ROOT_NAMESPACE, *self.get_conditional_namespaces()))
+        validators = self.get_validators(request, generations)
+        if is_not_modified(request, *validators):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+        return self.set_validators(request, response, *validators)
+
+    async def aget_conditional_response(self, handler, request,
+                                        *args, **kwargs):
+        generations = await cache.aget_generations(
+            (cache.ROOT_NAMESPACE, *self.get_conditional_namespaces()))
+        validators = self.get_validators(request, generations)
+        if is_not_modified(request, *validators):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = await handler(request, *args, **kwargs)
+        return self.set_validators(request, response, *validators)
+
+    def set_validators(self, request, response, etag, last_modified):
+        if response.status_code not in (status.HTTP_200_OK,
+                                        status.HTTP_304_NOT_MODIFIED):
+            return response
+        if (response.status_code == status.HTTP_200_OK
+                and request.META.get('HTTP_IF_NONE_MATCH') == '*'):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class CachedResponseMixin:
+    """Serves list and retrieve responses from the response cache.
+
+    Keys depend on the generations of `cache_namespace` (or its
+    `<namespace>:<pk>` form for a single object) and of `cache_depends_on`,
+    so model signals invalidate them without knowing the keys.
+    """
+
+    cache_namespace = None
+    cache_depends_on = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(
+            super().list, (self.cache_namespace,), request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        namespace = f'{self.cache_namespace}:{kwargs[self.lookup_field]}'
+        return self.get_cached_response(
+            super().retrieve, (namespace,), request, *args, **kwargs)
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aget_cached_response(
+            super().list, (self.cache_namespace,), request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        namespace = f'{self.cache_namespace}:{kwargs[self.lookup_field]}'
+        return await self.aget_cached_response(
+            super().retrieve, (namespace,), request, *args, **kwargs)
+
+    def get_cached_response(self, handler, namespaces, request,
+                            *args, **kwargs):
+        key = cache.make_key(request, namespaces + self.cache_depends_on)
+        data = cache.get_response_data(key)
+        cache.record(self.cache_namespace, hit=data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set_response_data(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def aget_cached_response(self, handler, namespaces, request,
+                                   *args, **kwargs):
+        key = await cache.amake_key(
+            request, namespaces + self.cache_depends_on)
+        data = await cache.aget_response_data(key)
+        cache.record(self.cache_namespace, hit=data is not None)
+        if data is not None:
+            return Response(data, headers={'X-Cache': 'HIT'})
+        response = await sync_to_async(handler)(request, *args, **kwargs)
+        if response.status_code == 200:
+            await cache.aset_response_data(key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class AsyncReadMixin:
+    """Serves GET list and retrieve of a viewset as coroutines.
+
+    Under ASGI cached responses are awaited through the async cache API
+    and only the database bound handler is passed to a worker thread.
+    Other methods go to the regular sync view. Without ASYNC_VIEWS, as
+    under WSGI, the viewset is served by the plain sync view.
+    """
+
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_VIEWS:
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            if (request.method != 'GET'
+                    or actions.get('get') not in cls.async_actions):
+                return await sync_view(request, *args, **kwargs)
+            self = cls(**initkwargs)
+            self.action_map = actions
+            self.get = getattr(self, actions['get'])
+            return await self.adispatch(request, *args, **kwargs)
+
+        # Keeps `cls`, `actions` and `csrf_exempt` for routers and checks.
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """Async counterpart of `APIView.dispatch` for read actions."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f'a{self.action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+        self.response = self.finalize_response(
+            request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        return await sync_to_async(super().list)(request, *args, **kwargs)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        return await sync_to_async(super().retrieve)(
+            request, *args, **kwargs)
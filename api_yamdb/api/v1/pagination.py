@@ -0,0 +1,223 @@
+import base64
+import datetime as dt
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    BasePagination,
+    LimitOffsetPagination,
+    _positive_int,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+
+
+def estimate_count(queryset):
+    """Returns the planner row estimate on PostgreSQL, exact count elsewhere.
+
+    The estimate comes from EXPLAIN, so it costs no table scan.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+def get_count_mode(request, default):
+    mode = request.query_params.get('count', default)
+    if mode not in (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE):
+        return default
+    return mode
+
+
+class OffsetPagination(LimitOffsetPagination):
+    """Limit/offset pagination with optional or estimated count.
+
+    `?count=none` skips COUNT(*) and `?count=estimate` replaces it with
+    the query planner estimate.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_mode = get_count_mode(request, COUNT_EXACT)
+        if self.count_mode == COUNT_EXACT:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.offset = self.get_offset(request)
+        self.request = request
+        self.count = None
+        if self.count_mode == COUNT_ESTIMATE:
+            self.count = estimate_count(queryset)
+        page = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(page) > self.limit
+        return page[:self.limit]
+
+    def get_next_link(self):
+        if self.count_mode == COUNT_EXACT:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(
+            url, self.offset_query_param, self.offset + self.limit)
+
+
+class KeysetPagination(BasePagination):
+    """Forward-only keyset pagination over the view `cursor_ordering`.
+
+    Every page is a single indexed range query, no matter how deep the
+    client has scrolled. The count is skipped unless asked for.
+    """
+
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = LimitOffsetPagination.default_limit
+    max_limit = None
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.ordering = getattr(view, 'cursor_ordering', ('id',))
+        self.limit = self.get_limit(request)
+        self.base_url = request.build_absolute_uri()
+        self.count_mode = get_count_mode(request, COUNT_NONE)
+        self.count = None
+        if self.count_mode == COUNT_EXACT:
+            self.count = queryset.count()
+        elif self.count_mode == COUNT_ESTIMATE:
+            self.count = estimate_count(queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        position = self.decode_cursor(request, queryset.model)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+        page = list(queryset[:self.limit + 1])
+        self.has_next = len(page) > self.limit
+        self.page = page[:self.limit]
+        return self.page
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get_position_filter(self, position):
+        """Builds `(k1, k2, ...) > (v1, v2, ...)` as portable OR-ed terms."""
+        condition = Q()
+        for index, key in enumerate(self.ordering):
+            field = key.lstrip('-')
+            lookup = 'lt' if key.startswith('-') else 'gt'
+            term = Q(**{f'{field}__{lookup}': position[index]})
+            for prev_key, value in zip(self.ordering[:index], position):
+                term &= Q(**{prev_key.lstrip('-'): value})
+            condition |= term
+        return condition
+
+    def decode_cursor(self, request, model):
+        """Returns cursor values converted by the ordering fields."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            position = json.loads(
+                base64.urlsafe_b64decode(encoded.encode('ascii')))
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)):
+            raise NotFound(self.invalid_cursor_message)
+        values = []
+        for key, value in zip(self.ordering, position):
+            field = model._meta.get_field(key.lstrip('-'))
+            try:
+                value = field.to_python(value)
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            values.append(value)
+        return values
+
+    def encode_cursor(self, item):
+        position = []
+        for key in self.ordering:
+            field = key.lstrip('-')
+            # Pages of `.values()` querysets hold dicts.
+            value = (item[field] if isinstance(item, dict)
+                     else getattr(item, field))
+            if isinstance(value, (dt.date, dt.datetime)):
+                value = value.isoformat()
+            position.append(value)
+        encoded = base64.urlsafe_b64encode(json.dumps(position).encode())
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        fields = [('next', self.get_next_link()), ('results', data)]
+        if self.count is not None:
+            fields.insert(0, ('count', self.count))
+        return Response(OrderedDict(fields))
+
+
+class KeysetOrOffsetPagination(BasePagination):
+    """Offset pagination by default, keyset on `?pagination=cursor`.
+
+    A `cursor` parameter implies the keyset mode, so `next` links keep
+    working without repeating the mode.
+    """
+
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+
+    def __init__(self):
+        self.paginator = OffsetPagination()
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if (request.query_params.get(self.mode_query_param)
+                == self.cursor_mode
+                or KeysetPagination.cursor_query_param
+                in request.query_params):
+            self.paginator = KeysetPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_fields(self, view):
+        return OffsetPagination().get_schema_fields(view)
+
+    def get_schema_operation_parameters(self, view):
+        return OffsetPagination().get_schema_operation_parameters(view)
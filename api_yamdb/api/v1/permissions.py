@@ -28,5 +28,6 @@ class AuthorOrStaffOrReadOnly(BasePermission):
 
     def has_object_permission(self, request, view, obj):
         return (request.method in SAFE_METHODS
-                or obj.author == request.user
+                # Compares ids, token users have no model instance.
+                or obj.author_id == request.user.pk
                 or request.user.is_moderator)
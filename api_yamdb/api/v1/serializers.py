@@ -1,11 +1,23 @@
 import datetime as dt
+from collections import Counter, defaultdict
+from api.authentication import get_access_token
+from api.cache import invalidate
+from django.conf import settings
 from django.contrib.auth import authenticate
 from django.core.validators import MaxValueValidator
+from django.db import IntegrityError, connections, router
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import (
+    TokenRefreshSerializer as BaseTokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from reviews.models import Comment, Review
-from titles.models import Category, Genre, Title
+from titles.models import Category, Genre, GenreTitle, Title
 from users.models import User
+from .mixins import plan_queryset
 
 
 class TokenSerializer(serializers.Serializer):
@@ -27,10 +39,24 @@ class TokenSerializer(serializers.Serializer):
 
         return {
             'refresh': str(token),
-            'access': str(token.access_token)
+            'access': str(get_access_token(token, user))
         }
 
 
+class TokenRefreshSerializer(BaseTokenRefreshSerializer):
+    """Issues an access token with the current claims of the user."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(
+            pk=refresh.get(jwt_settings.USER_ID_CLAIM), is_active=True
+        ).first()
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден или неактивен', code='user_inactive')
+        return {'access': str(get_access_token(refresh, user))}
+
+
 class UserSerializerForAdmin(serializers.ModelSerializer):
     """User model serializer for admin."""
 
@@ -109,6 +135,10 @@ class TitleReadSerializer(serializers.ModelSerializer):
             'category', 'rating',
         )
         read_only_fields = ('__all__',)
+        # Columns behind non-field attributes, for sparse fieldsets.
+        column_sources = {'rating': ('rating_sum', 'rating_count')}
+        # Genres keep the order they were assigned in.
+        prefetch_ordering = {'genre': ('genretitle__id',)}
 
 
 class ReviewSerializer(serializers.ModelSerializer):
@@ -125,17 +155,15 @@ class ReviewSerializer(serializers.ModelSerializer):
         fields = ('title', 'id', 'text', 'author', 'score', 'pub_date')
         read_only_fields = ('title', 'author')
 
-    def validate(self, attrs):
-        request = self.context['request']
-        if (request.method == 'POST'
-                and request.user.reviews.filter(
-                title__id=request.parser_context['kwargs']['title_id']
-                ).exists()):
+    def create(self, validated_data):
+        # The unique constraint is checked by the insert itself instead
+        # of a separate query.
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
             raise serializers.ValidationError(
                 'Можно оставить только один отзыв')
 
-        return attrs
-
 
 class CommentSerializer(serializers.ModelSerializer):
     """Comment model serializer."""
@@ -148,3 +176,290 @@ class CommentSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('review', 'id', 'author', 'text', 'pub_date')
         read_only_fields = ('review',)
+
+
+def bulk_insert(model, objs):
+    """Inserts objects in batches and fills their primary keys.
+
+    Backends that can not return rows from a bulk insert fall back
+    to one insert per object.
+    """
+    features = connections[router.db_for_write(model)].features
+    if features.can_return_rows_from_bulk_insert:
+        return model.objects.bulk_create(
+            objs, batch_size=settings.BULK_BATCH_SIZE)
+    for obj in objs:
+        obj.save(force_insert=True)
+    return objs
+
+
+def add_error(errors, index, field, message):
+    errors[index].setdefault(field, []).append(message)
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """Batch serializer resolving relations once for the whole batch.
+
+    Items are validated field by field first, then `resolve()` looks up
+    related objects of all valid items together. Errors are returned
+    as a list aligned with the input items.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    self.error_messages['not_a_list'].format(
+                        input_type=type(data).__name__)
+                ]
+            }, code='not_a_list')
+        if not data or len(data) > settings.BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    f'Передайте от 1 до {settings.BULK_MAX_ITEMS} элементов'
+                ]
+            }, code='bulk_size')
+
+        items, errors = [], []
+        for item in data:
+            try:
+                items.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                items.append(None)
+                errors.append(exc.detail)
+        self.resolve(
+            [(index, item) for index, item in enumerate(items) if item],
+            errors
+        )
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def resolve(self, items, errors):
+        """Replaces lookup values of (index, item) pairs with objects."""
+
+
+class TitleBulkListSerializer(BulkListSerializer):
+    """Creates or updates titles with their genres in a few queries."""
+
+    def resolve(self, items, errors):
+        genres = Genre.objects.in_bulk(
+            {slug for _, item in items for slug in item.get('genre', ())},
+            field_name='slug'
+        )
+        categories = Category.objects.in_bulk(
+            {item['category'] for _, item in items if 'category' in item},
+            field_name='slug'
+        )
+        self.titles = {}
+        if self.instance is not None:
+            self.titles = self.instance.in_bulk(
+                {item['id'] for _, item in items if 'id' in item})
+        seen = set()
+        for index, item in items:
+            if 'genre' in item:
+                missing = [slug for slug in item['genre']
+                           if slug not in genres]
+                for slug in missing:
+                    add_error(errors, index, 'genre',
+                              f'Жанр {slug} не найден')
+                item['genre'] = [genres.get(slug) for slug in item['genre']]
+            if 'category' in item:
+                item['category'] = categories.get(item['category'])
+                if item['category'] is None:
+                    add_error(errors, index, 'category',
+                              'Категория не найдена')
+            self.check_id(index, item, errors, seen)
+
+    def check_id(self, index, item, errors, seen):
+        """Drops ids on create, requires unique known ids on update."""
+        if self.instance is None:
+            item.pop('id', None)
+        elif 'id' not in item:
+            add_error(errors, index, 'id', 'Обязательное поле.')
+        elif item['id'] not in self.titles:
+            add_error(errors, index, 'id', 'Произведение не найдено')
+        elif item['id'] in seen:
+            add_error(errors, index, 'id', 'Произведение повторяется')
+        else:
+            seen.add(item['id'])
+
+    def to_representation(self, data):
+        serializer = TitleSerializer(many=True)
+        titles = plan_queryset(Title.objects.all(), serializer).in_bulk(
+            [title.pk for title in data])
+        return serializer.to_representation(
+            [titles[title.pk] for title in data])
+
+    def create(self, validated_data):
+        titles = bulk_insert(Title, [
+            Title(**{field: value for field, value in attrs.items()
+                     if field != 'genre'})
+            for attrs in validated_data
+        ])
+        GenreTitle.objects.bulk_create(
+            [GenreTitle(title=title, genre=genre)
+             for title, attrs in zip(titles, validated_data)
+             for genre in attrs['genre']],
+            batch_size=settings.BULK_BATCH_SIZE
+        )
+        invalidate('title')
+        return titles
+
+    def update(self, instance, validated_data):
+        titles, fields, genres = [], set(), {}
+        for attrs in validated_data:
+            title = self.titles[attrs.pop('id')]
+            if 'genre' in attrs:
+                genres[title.pk] = attrs.pop('genre')
+            for field, value in attrs.items():
+                setattr(title, field, value)
+                fields.add(field)
+            titles.append(title)
+        if fields:
+            Title.objects.bulk_update(
+                titles, fields, batch_size=settings.BULK_BATCH_SIZE)
+        if genres:
+            GenreTitle.objects.filter(title_id__in=genres).delete()
+            GenreTitle.objects.bulk_create(
+                [GenreTitle(title_id=title_id, genre=genre)
+                 for title_id, items in genres.items() for genre in items],
+                batch_size=settings.BULK_BATCH_SIZE
+            )
+        invalidate('title', *(f'title:{title.pk}' for title in titles))
+        return titles
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    """Title serializer for batch writes."""
+
+    id = serializers.IntegerField(required=False)
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+    year = serializers.IntegerField(
+        validators=[MaxValueValidator(dt.date.today().year)]
+    )
+
+    class Meta:
+        model = Title
+        fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+
+class ReviewBulkListSerializer(BulkListSerializer):
+    """Imports reviews of many authors and titles in a few queries."""
+
+    def resolve(self, items, errors):
+        titles = set(Title.objects.filter(
+            pk__in={item['title'] for _, item in items}
+        ).values_list('pk', flat=True))
+        authors = dict(User.objects.filter(
+            username__in={item['author'] for _, item in items}
+        ).values_list('username', 'pk'))
+        taken = set(Review.objects.filter(
+            title_id__in=titles, author_id__in=authors.values()
+        ).values_list('title_id', 'author_id'))
+        for index, item in items:
+            item['title_id'] = item.pop('title')
+            item['author_id'] = authors.get(item.pop('author'))
+            if item['title_id'] not in titles:
+                add_error(errors, index, 'title', 'Произведение не найдено')
+            if item['author_id'] is None:
+                add_error(errors, index, 'author', 'Пользователь не найден')
+            pair = (item['title_id'], item['author_id'])
+            if pair in taken:
+                add_error(errors, index, api_settings.NON_FIELD_ERRORS_KEY,
+                          'Можно оставить только один отзыв')
+            taken.add(pair)
+
+    def create(self, validated_data):
+        Review.objects.bulk_create(
+            [Review(**attrs) for attrs in validated_data],
+            batch_size=settings.BULK_BATCH_SIZE
+        )
+        scores = defaultdict(Counter)
+        for attrs in validated_data:
+            scores[attrs['title_id']][attrs['score']] += 1
+        for title_id, title_scores in scores.items():
+            Title.objects.filter(pk=title_id).change_scores(title_scores)
+        invalidate('title', *(f'title:{pk}' for pk in scores),
+                   *(f'reviews:{pk}' for pk in scores))
+        created = Review.objects.filter(
+            title_id__in=scores,
+            author_id__in={attrs['author_id'] for attrs in validated_data}
+        ).select_related('author').in_bulk()
+        by_pair = {
+            (review.title_id, review.author_id): review
+            for review in created.values()
+        }
+        return [by_pair[attrs['title_id'], attrs['author_id']]
+                for attrs in validated_data]
+
+
+class ReviewBulkSerializer(serializers.ModelSerializer):
+    """Review serializer for batch imports."""
+
+    title = serializers.IntegerField()
+    author = serializers.CharField(max_length=150)
+
+    class Meta:
+        model = Review
+        fields = ('title', 'author', 'text', 'score')
+        list_serializer_class = ReviewBulkListSerializer
+        # Pairs are checked in one query by the list serializer, the
+        # automatic unique together check can not look up a username.
+        validators = []
+
+    def to_representation(self, instance):
+        return ReviewSerializer(instance).data
+
+
+class GenreTitleBulkListSerializer(BulkListSerializer):
+    """Adds genres to many titles, existing pairs are skipped."""
+
+    def resolve(self, items, errors):
+        titles = set(Title.objects.filter(
+            pk__in={item['title'] for _, item in items}
+        ).values_list('pk', flat=True))
+        genres = Genre.objects.in_bulk(
+            {slug for _, item in items for slug in item['genre']},
+            field_name='slug'
+        )
+        self.existing = set(GenreTitle.objects.filter(
+            title_id__in=titles
+        ).values_list('title_id', 'genre_id'))
+        for index, item in items:
+            if item['title'] not in titles:
+                add_error(errors, index, 'title', 'Произведение не найдено')
+            for slug in item['genre']:
+                if slug not in genres:
+                    add_error(errors, index, 'genre',
+                              f'Жанр {slug} не найден')
+            item['genres'] = [genres.get(slug) for slug in item['genre']]
+
+    def create(self, validated_data):
+        pairs = {
+            (attrs['title'], genre.pk)
+            for attrs in validated_data for genre in attrs['genres']
+        } - self.existing
+        GenreTitle.objects.bulk_create(
+            [GenreTitle(title_id=title_id, genre_id=genre_id)
+             for title_id, genre_id in sorted(pairs)],
+            batch_size=settings.BULK_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        invalidate('title', *(f'title:{attrs["title"]}'
+                              for attrs in validated_data))
+        return validated_data
+
+
+class GenreTitleBulkSerializer(serializers.Serializer):
+    """Genre assignment serializer for batch writes."""
+
+    title = serializers.IntegerField()
+    genre = serializers.ListField(
+        child=serializers.SlugField(), allow_empty=False)
+
+    class Meta:
+        list_serializer_class = GenreTitleBulkListSerializer
@@ -3,17 +3,23 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     CategoryViewSet,
     CommentViewSet,
+    ExportView,
     GenreViewSet,
+    LeaderboardView,
+    MetricsView,
+    ReviewBulkView,
     ReviewViewSet,
     SignupView,
     TitleViewSet,
+    TokenRefreshView,
     TokenView,
     UserViewSet,
 )
 
 auth_patterns = [
     path('signup/', SignupView.as_view(), name='signup'),
-    path('token/', TokenView.as_view(), name='token_obtain')
+    path('token/', TokenView.as_view(), name='token_obtain'),
+    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
 ]
 
 router = DefaultRouter()
@@ -30,4 +36,10 @@ router.register('categories', CategoryViewSet, basename='category')
 urlpatterns = [
     path('', include(router.urls)),
     path('auth/', include(auth_patterns)),
+    path('reviews/bulk/', ReviewBulkView.as_view(), name='review_bulk'),
+    path('export/<slug:dataset>.<slug:fmt>', ExportView.as_view(),
+         name='export'),
+    path('leaderboards/<slug:board>/', LeaderboardView.as_view(),
+         name='leaderboard'),
+    path('metrics/', MetricsView.as_view(), name='metrics'),
 ]
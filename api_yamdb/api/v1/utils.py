@@ -1,6 +1,6 @@
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from users.models import User
+from api.backends import reset_attempts
+from core.models import OutboxEmail
+from users.models import ConfirmationCode, User
 from dataclasses import dataclass
 
 
@@ -10,29 +10,30 @@ class ConfirmationManager():
 
     user: User
 
-    def get_message(self) -> str:
+    def get_message(self, code: str) -> str:
         """Generates a code message."""
 
         return f'''
         Имя пользователя: {self.user.username}
-        confirmation_code: {default_token_generator.make_token(self.user)}
+        confirmation_code: {code}
         '''
 
     def send_code(self) -> None:
-        """Sends confirmation code by some method."""
+        """Issues a new code and sends it by some method."""
 
-        self.send_by_email()
+        code = ConfirmationCode.objects.issue(self.user)
+        reset_attempts(self.user.username)
+        self.send_by_email(code)
 
-    def send_by_email(self) -> int:
-        """Sends confirmation code by email."""
+    def send_by_email(self, code: str) -> OutboxEmail:
+        """Queues confirmation code email for the `send_outbox` worker."""
 
         from_email = 'admin@yamdb.com'
         subject = 'Код подтверждения регистрации в api_yamdb'
 
-        return send_mail(
-            subject,
-            self.get_message(),
-            from_email,
-            [self.user.email],
-            fail_silently=False
+        return OutboxEmail.objects.create(
+            subject=subject,
+            body=self.get_message(code),
+            from_email=from_email,
+            to=self.user.email
         )
@@ -0,0 +1,138 @@
+import functools
+from collections import defaultdict
+
+from rest_framework import serializers
+from rest_framework.relations import PKOnlyObject
+from titles.models import Genre
+
+
+def represent_pk(field, value):
+    return field.to_representation(PKOnlyObject(value))
+
+
+class ValuesSerializer:
+    """Read-only list serializer working on `.values()` rows.
+
+    Mirrors the fields of a regular serializer instance, sparse
+    fieldsets included, and renders plain columns with the same field
+    objects, so the output is identical without building model
+    instances. `columns` maps plain fields to `.values()` lookups;
+    other fields are rendered by `represent_<name>(row, related)`
+    from the lookups listed in `related_columns`.
+    """
+
+    columns = {}
+    related_columns = {}
+
+    def __init__(self, serializer, extra_columns=()):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        self.fields = serializer.fields
+        self.extra_columns = extra_columns
+
+    def get_queryset(self, queryset):
+        lookups = dict.fromkeys(self.extra_columns)
+        for name in self.fields:
+            if name in self.columns:
+                lookups[self.columns[name]] = None
+            else:
+                lookups.update(dict.fromkeys(self.related_columns[name]))
+        return queryset.prefetch_related(None).values(*lookups)
+
+    def get_related(self, rows):
+        """Loads data shared by the page rows, e.g. many-to-many values."""
+        return None
+
+    def get_plan(self):
+        """Returns (name, column, convert) per field, in field order."""
+        plan = []
+        for name, field in self.fields.items():
+            column = self.columns.get(name)
+            if column is None:
+                convert = getattr(self, f'represent_{name}')
+            elif isinstance(field, serializers.PrimaryKeyRelatedField):
+                convert = functools.partial(represent_pk, field)
+            else:
+                convert = field.to_representation
+            plan.append((name, column, convert))
+        return plan
+
+    def to_representation(self, rows):
+        rows = list(rows)
+        related = self.get_related(rows)
+        plan = self.get_plan()
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in plan:
+                if column is None:
+                    item[name] = convert(row, related)
+                    continue
+                value = row[column]
+                item[name] = None if value is None else convert(value)
+            data.append(item)
+        return data
+
+
+class TitleValuesSerializer(ValuesSerializer):
+    """Values counterpart of TitleReadSerializer."""
+
+    columns = {
+        'id': 'id', 'name': 'name', 'year': 'year',
+        'description': 'description',
+    }
+    related_columns = {
+        'genre': ('id',),
+        'category': ('category_id', 'category__name', 'category__slug'),
+        'rating': ('rating_sum', 'rating_count'),
+    }
+
+    def get_related(self, rows):
+        if 'genre' not in self.fields:
+            return None
+        genres = defaultdict(list)
+        # Same order as the `genre` prefetch of TitleReadSerializer.
+        for title_id, name, slug in Genre.objects.filter(
+            title__in=[row['id'] for row in rows]
+        ).order_by('genretitle__id').values_list('title', 'name', 'slug'):
+            genres[title_id].append({'name': name, 'slug': slug})
+        return genres
+
+    def represent_genre(self, row, genres):
+        return genres.get(row['id'], [])
+
+    def represent_category(self, row, related):
+        if row['category_id'] is None:
+            return None
+        return {'name': row['category__name'], 'slug': row['category__slug']}
+
+    def represent_rating(self, row, related):
+        if not row['rating_count']:
+            return None
+        return row['rating_sum'] // row['rating_count']
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    """Values counterpart of ReviewSerializer."""
+
+    columns = {
+        'id': 'id', 'text': 'text', 'score': 'score', 'pub_date': 'pub_date',
+        'title': 'title_id',
+    }
+    related_columns = {'author': ('author__username',)}
+
+    def represent_author(self, row, related):
+        return row['author__username']
+
+
+class CommentValuesSerializer(ValuesSerializer):
+    """Values counterpart of CommentSerializer."""
+
+    columns = {
+        'id': 'id', 'text': 'text', 'pub_date': 'pub_date',
+        'review': 'review_id',
+    }
+    related_columns = {'author': ('author__username',)}
+
+    def represent_author(self, row, related):
+        return row['author__username']
@@ -1,43 +1,78 @@
-from django.db.models import Avg
+from api.authentication import get_author, get_request_user
+from api.cache import get_rating_prior
+from api.metrics import registry
+from api.throttling import AuthThrottle, ConfirmationThrottle
+from core.datasets import CONTENT_TYPES, export, get_dataset
+from core.pool import render_metrics as render_pool_metrics
+from django.db import transaction
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, mixins, permissions, status, viewsets
 from rest_framework.decorators import action, APIView
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.generics import get_object_or_404
-from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenViewBase
-from reviews.models import Review
-from titles.models import Category, Genre, Title
+from reviews.models import Comment, Review
+from titles.leaderboards import BOARD_SCOPES
+from titles.models import (
+    Category,
+    CategoryStats,
+    Genre,
+    GenreStats,
+    LeaderboardEntry,
+    SCORES,
+    Title,
+    score_field,
+)
 from users.models import User
 from .utils import ConfirmationManager
 from .filters import TitleFilter
+from .mixins import (
+    AsyncReadMixin,
+    CachedResponseMixin,
+    ConditionalResponseMixin,
+    QueryPlanMixin,
+    SparseFieldsetMixin,
+    ValuesListMixin,
+)
+from .pagination import KeysetOrOffsetPagination
 from .permissions import AuthorOrStaffOrReadOnly, IsAdmin, IsAdminOrReadOnly
 from .serializers import (
     CategorySerializer,
     CommentSerializer,
     GenreSerializer,
+    GenreTitleBulkSerializer,
+    ReviewBulkSerializer,
     ReviewSerializer,
+    TitleBulkSerializer,
     TitleReadSerializer,
     TitleSerializer,
+    TokenRefreshSerializer,
     TokenSerializer,
     UserSerializerForAdmin,
     UserSerializerForUser
 )
+from .values import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer,
+)
 
 
 class SignupView(APIView):
     """Signup view."""
 
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (AuthThrottle, ConfirmationThrottle)
 
     def post(self, request):
         serializer = UserSerializerForUser(data=request.data)
         serializer.is_valid(raise_exception=True)
-        print('creating user')
-        user, _ = User.objects.get_or_create(**serializer.validated_data)
-        print('user created')
-        ConfirmationManager(user=user).send_code()
-        print('code sent')
+        with transaction.atomic():
+            user, _ = User.objects.get_or_create(**serializer.validated_data)
+            ConfirmationManager(user=user).send_code()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
@@ -45,6 +80,14 @@ class TokenView(TokenViewBase):
     """Token view."""
 
     serializer_class = TokenSerializer
+    throttle_classes = (AuthThrottle,)
+
+
+class TokenRefreshView(TokenViewBase):
+    """Issues a new access token for a refresh token."""
+
+    serializer_class = TokenRefreshSerializer
+    throttle_classes = (AuthThrottle,)
 
 
 class UserViewSet(viewsets.ModelViewSet):
@@ -65,11 +108,12 @@ class UserViewSet(viewsets.ModelViewSet):
             name='My information'
             )
     def me(self, request):
+        user = get_request_user(request)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
         serializer = self.get_serializer(
-            request.user,
+            user,
             data=request.data,
             partial=True
         )
@@ -89,7 +133,30 @@ class ListCreateDestroyViewSet(mixins.ListModelMixin,
     pass
 
 
-class GenreViewSet(ListCreateDestroyViewSet):
+class RollupStatsMixin:
+    """Serves the batch computed rating rollup at `<slug>/stats/`."""
+
+    stats_model = None
+
+    @action(detail=True, methods=['GET'], name='Rating statistics')
+    def stats(self, request, slug=None):
+        obj = get_object_or_404(
+            self.queryset.select_related('stats'), slug=slug)
+        try:
+            stats = obj.stats
+        except self.stats_model.DoesNotExist:
+            # Not rolled up yet by `refresh_stats`.
+            stats = self.stats_model()
+        return Response({
+            'slug': obj.slug,
+            'titles_count': stats.titles_count,
+            **stats.get_stats(get_rating_prior()),
+        })
+
+
+class GenreViewSet(ConditionalResponseMixin, CachedResponseMixin,
+                   SparseFieldsetMixin, RollupStatsMixin,
+                   ListCreateDestroyViewSet):
     """Genre model view set."""
 
     queryset = Genre.objects.all()
@@ -98,9 +165,13 @@ class GenreViewSet(ListCreateDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_namespace = 'genre'
+    stats_model = GenreStats
 
 
-class CategoryViewSet(ListCreateDestroyViewSet):
+class CategoryViewSet(ConditionalResponseMixin, CachedResponseMixin,
+                      SparseFieldsetMixin, RollupStatsMixin,
+                      ListCreateDestroyViewSet):
     """Category model view set."""
 
     queryset = Category.objects.all()
@@ -109,54 +180,221 @@ class CategoryViewSet(ListCreateDestroyViewSet):
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
     lookup_field = 'slug'
+    cache_namespace = 'category'
+    stats_model = CategoryStats
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(ConditionalResponseMixin, CachedResponseMixin,
+                   SparseFieldsetMixin, QueryPlanMixin, AsyncReadMixin,
+                   ValuesListMixin, viewsets.ModelViewSet):
     """Title model view set."""
 
-    queryset = Title.objects.annotate(
-        rating=Avg('reviews__score'))
+    queryset = Title.objects.all()
     permission_classes = (IsAdminOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    pagination_class = KeysetOrOffsetPagination
+    cursor_ordering = ('id',)
+    cache_namespace = 'title'
+    cache_depends_on = ('genre', 'category')
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    values_serializer_class = TitleValuesSerializer
 
     def get_serializer_class(self):
         if self.request.method in ('POST', 'PATCH'):
             return TitleSerializer
         return TitleReadSerializer
 
+    @action(detail=False,
+            methods=['POST', 'PATCH'],
+            permission_classes=(IsAdmin,),
+            name='Bulk titles'
+            )
+    def bulk(self, request):
+        if request.method == 'POST':
+            serializer = TitleBulkSerializer(data=request.data, many=True)
+            response_status = status.HTTP_201_CREATED
+        else:
+            serializer = TitleBulkSerializer(
+                Title.objects.all(),
+                data=request.data,
+                many=True,
+                partial=True
+            )
+            response_status = status.HTTP_200_OK
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=response_status)
+
+    @action(detail=True, methods=['GET'], name='Rating statistics')
+    def stats(self, request, pk=None):
+        # Reads one row by primary key, reviews are not touched.
+        title = get_object_or_404(Title.objects.only(
+            'rating_sum', 'rating_count',
+            *(score_field(score) for score in SCORES)), pk=pk)
+        return Response({
+            'id': title.pk, **title.get_stats(get_rating_prior())})
+
+    @action(detail=False,
+            methods=['POST'],
+            permission_classes=(IsAdmin,),
+            url_path='bulk-genres',
+            name='Bulk genre assignments'
+            )
+    def bulk_genres(self, request):
+        serializer = GenreTitleBulkSerializer(data=request.data, many=True)
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(ConditionalResponseMixin, SparseFieldsetMixin,
+                    QueryPlanMixin, AsyncReadMixin, ValuesListMixin,
+                    viewsets.ModelViewSet):
     """Review model view set."""
 
+    queryset = Review.objects.all()
     serializer_class = ReviewSerializer
+    values_serializer_class = ReviewValuesSerializer
     permission_classes = (AuthorOrStaffOrReadOnly,)
-    pagination_class = LimitOffsetPagination
+    throttle_scope = 'reviews'
+    pagination_class = KeysetOrOffsetPagination
+    cursor_ordering = ('pub_date', 'id')
+
+    def get_conditional_namespaces(self):
+        # Reviews are shown with the username of the author.
+        return (f'reviews:{self.kwargs["title_id"]}', 'author')
+
+    @cached_property
+    def title(self):
+        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
 
     def get_queryset(self):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        return title.reviews.all()
+        return super().get_queryset().filter(title=self.title)
 
     def perform_create(self, serializer):
-        title = get_object_or_404(Title, id=self.kwargs.get('title_id'))
-        serializer.save(author=self.request.user, title=title)
+        serializer.save(author=get_author(self.request), title=self.title)
+
 
+class ReviewBulkView(APIView):
+    """Bulk review import view."""
 
-class CommentViewSet(viewsets.ModelViewSet):
+    permission_classes = (IsAdmin,)
+
+    def post(self, request):
+        serializer = ReviewBulkSerializer(data=request.data, many=True)
+        with transaction.atomic():
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+class CommentViewSet(ConditionalResponseMixin, SparseFieldsetMixin,
+                     QueryPlanMixin, AsyncReadMixin, ValuesListMixin,
+                     viewsets.ModelViewSet):
     """Comment model view set."""
 
+    queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    values_serializer_class = CommentValuesSerializer
     permission_classes = (AuthorOrStaffOrReadOnly,)
+    throttle_scope = 'reviews'
+    pagination_class = KeysetOrOffsetPagination
+    cursor_ordering = ('-pub_date', '-id')
 
-    def get_queryset(self):
-        review = get_object_or_404(
+    def get_conditional_namespaces(self):
+        return (f'comments:{self.kwargs["review_id"]}', 'author')
+
+    @cached_property
+    def review(self):
+        return get_object_or_404(
             Review,
             title__id=self.kwargs.get('title_id'),
             id=self.kwargs.get('review_id')
         )
-        return review.comments.all()
+
+    def get_queryset(self):
+        return super().get_queryset().filter(review=self.review)
 
     def perform_create(self, serializer):
-        review = get_object_or_404(Review, id=self.kwargs.get('review_id'))
-        serializer.save(author=self.request.user, review=review)
+        serializer.save(author=get_author(self.request), review=self.review)
+
+
+class ExportView(APIView):
+    """Streams a dataset as CSV or NDJSON for admins."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request, dataset, fmt):
+        try:
+            dataset = get_dataset(dataset)
+        except LookupError:
+            raise NotFound('Набор данных не найден')
+        if fmt not in CONTENT_TYPES:
+            raise NotFound('Формат не поддерживается')
+        response = StreamingHttpResponse(
+            export(dataset, fmt), content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = (
+            f'attachment; filename="{dataset.name}.{fmt}"')
+        return response
+
+
+class LeaderboardView(APIView):
+    """Serves a precomputed leaderboard with one indexed query.
+
+    `?genre=<slug>`, `?category=<slug>` or `?year=<year>` select
+    the board of a group instead of the whole catalogue.
+    """
+
+    permission_classes = (permissions.AllowAny,)
+    fields = ('position', 'score', 'title_id', 'title__name',
+              'title__year', 'title__rating_sum', 'title__rating_count')
+
+    def get_scope(self, board):
+        scopes = [scope for scope in BOARD_SCOPES[board]
+                  if scope in self.request.query_params]
+        if len(scopes) > 1:
+            raise ValidationError(
+                {'detail': 'Укажите только один параметр: '
+                 + ', '.join(scopes)})
+        if not scopes:
+            return LeaderboardEntry.ALL, ''
+        return scopes[0], self.request.query_params[scopes[0]]
+
+    def get(self, request, board):
+        if board not in BOARD_SCOPES:
+            raise NotFound('Рейтинг не найден')
+        scope, key = self.get_scope(board)
+        rows = LeaderboardEntry.objects.filter(
+            board=board, scope=scope, key=key
+        ).order_by('position').values_list(*self.fields)
+        results = [
+            {
+                'position': position,
+                'score': score,
+                'title': {
+                    'id': title_id,
+                    'name': name,
+                    'year': year,
+                    'rating': (rating_sum // rating_count
+                               if rating_count else None),
+                },
+            }
+            for position, score, title_id, name, year, rating_sum,
+            rating_count in rows
+        ]
+        return Response({
+            'board': board, 'scope': scope, 'key': key, 'results': results})
+
+
+class MetricsView(APIView):
+    """Request and pool metrics in Prometheus text format for admins."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render() + render_pool_metrics(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
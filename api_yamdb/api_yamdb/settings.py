@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'api.apps.ApiConfig',
     'titles.apps.TitlesConfig',
     'reviews.apps.ReviewsConfig',
     'core.apps.CoreConfig',
@@ -32,10 +33,13 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.middleware.RequestMetricsMiddleware',
+    'api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,10 +76,60 @@ DATABASES = {
         'USER': os.getenv('POSTGRES_USER', default=None),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default=None),
         'HOST': os.getenv('DB_HOST', default=None),
-        'PORT': os.getenv('DB_PORT', default=None)
+        'PORT': os.getenv('DB_PORT', default=None),
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', default=60)),
+        'CONN_HEALTH_CHECKS':
+            os.getenv('DB_CONN_HEALTH_CHECKS', default='True') == 'True',
+        # Used by the core.backends.pooled_postgresql engine.
+        'POOL_SIZE': int(os.getenv('DB_POOL_SIZE', default=10)),
+        'POOL_TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+        # Required behind pgbouncer in transaction pooling mode.
+        'DISABLE_SERVER_SIDE_CURSORS': os.getenv(
+            'DB_DISABLE_SERVER_SIDE_CURSORS', default='False') == 'True',
     }
 }
 
+# Replicas share the primary settings except for host and database name,
+# e.g. DB_REPLICA_HOSTS=replica1,replica2 or, for SQLite, DB_REPLICA_NAMES.
+DATABASE_REPLICAS = []
+_replica_hosts = list(filter(None, os.getenv(
+    'DB_REPLICA_HOSTS', default='').split(',')))
+_replica_names = list(filter(None, os.getenv(
+    'DB_REPLICA_NAMES', default='').split(',')))
+for _index in range(max(len(_replica_hosts), len(_replica_names))):
+    _alias = f'replica_{_index + 1}'
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'HOST': (_replica_hosts[_index] if _index < len(_replica_hosts)
+                 else DATABASES['default']['HOST']),
+        'NAME': (_replica_names[_index] if _index < len(_replica_names)
+                 else DATABASES['default']['NAME']),
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(_alias)
+
+DATABASE_ROUTERS = ['api.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=5))
+
+
+# Cache
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='api_yamdb'),
+    }
+}
+
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', default=300))
+
+# Serve reads through coroutine views, set by asgi.py. Under WSGI every
+# coroutine view would need its own event loop per request.
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', default='False') == 'True'
+
 
 # Password validation
 
@@ -107,8 +161,6 @@ TIME_ZONE = 'UTC'
 
 USE_I18N = True
 
-USE_L10N = True
-
 USE_TZ = False
 
 
@@ -122,26 +174,90 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 AUTH_USER_MODEL = 'users.User'
 
+DEFAULT_AUTO_FIELD = 'django.db.models.AutoField'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_PAGINATION_CLASS':
         'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 10,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttling.WriteThrottle',
+    ],
+    # Client address is taken from X-Forwarded-For behind this many
+    # proxies (nginx), entries added by the client itself are ignored.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', default=1)),
+}
+
+# Fixed windows, '<size>/<s|m|h|d>': `size` requests per period.
+# An empty rate turns the scope off.
+THROTTLE_CACHE_ALIAS = 'default'
+THROTTLE_RATES = {
+    'auth': os.getenv('THROTTLE_AUTH_RATE', default='20/m'),
+    'confirmation': os.getenv('THROTTLE_CONFIRMATION_RATE', default='5/h'),
+    'reviews': os.getenv('THROTTLE_REVIEWS_RATE', default='30/m'),
+    'write': os.getenv('THROTTLE_WRITE_RATE', default='60/m'),
+    'admin': os.getenv('THROTTLE_ADMIN_RATE', default='600/m'),
 }
 
+SERVER_TIMING = os.getenv('SERVER_TIMING', default='True') == 'True'
+
+# Read-only list pages are rendered from `.values()` rows.
+VALUES_SERIALIZERS = os.getenv('VALUES_SERIALIZERS', default='True') == 'True'
+
+RESPONSE_COMPRESSION = os.getenv(
+    'RESPONSE_COMPRESSION', default='True') == 'True'
+# Low brotli levels compress dynamic responses about as fast as gzip.
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', default=4))
+
+USER_CACHE_TIMEOUT = int(os.getenv('USER_CACHE_TIMEOUT', default=60))
+
+CONFIRMATION_CODE_LENGTH = 6
+CONFIRMATION_CODE_MINUTES = int(
+    os.getenv('CONFIRMATION_CODE_MINUTES', default=60))
+# Wrong codes accepted before the code is burned.
+CONFIRMATION_MAX_ATTEMPTS = int(
+    os.getenv('CONFIRMATION_MAX_ATTEMPTS', default=5))
+UNKNOWN_USERNAME_TIMEOUT = int(
+    os.getenv('UNKNOWN_USERNAME_TIMEOUT', default=300))
+
+# Reviews of the mean score added to every Bayesian rating.
+RATING_PRIOR_WEIGHT = int(os.getenv('RATING_PRIOR_WEIGHT', default=10))
+RATING_PRIOR_TIMEOUT = int(os.getenv('RATING_PRIOR_TIMEOUT', default=3600))
+
+LEADERBOARD_SIZE = int(os.getenv('LEADERBOARD_SIZE', default=100))
+TRENDING_WINDOW_DAYS = int(os.getenv('TRENDING_WINDOW_DAYS', default=7))
+TRENDING_HALF_LIFE_HOURS = float(
+    os.getenv('TRENDING_HALF_LIFE_HOURS', default=48))
+
+BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', default=5000))
+BULK_BATCH_SIZE = 1000
+
 SIMPLE_JWT = {
-    'ACCESS_TOKEN_LIFETIME': timedelta(days=10),
+    'ACCESS_TOKEN_LIFETIME': timedelta(
+        minutes=int(os.getenv('ACCESS_TOKEN_MINUTES', default=30))),
+    'REFRESH_TOKEN_LIFETIME': timedelta(
+        days=int(os.getenv('REFRESH_TOKEN_DAYS', default=10))),
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
+# Trust the role claims of access tokens instead of loading the user.
+TOKEN_CLAIMS_AUTH = os.getenv('TOKEN_CLAIMS_AUTH', default='False') == 'True'
 
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', default=5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', default=30))
+
 AUTHENTICATION_BACKENDS = [
     'django.contrib.auth.backends.ModelBackend',
     'api.backends.AuthBackend',
@@ -0,0 +1,16 @@
+from django.contrib import admin
+
+from .models import OutboxEmail
+
+
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'to', 'subject', 'status', 'attempts',
+                    'next_attempt_at')
+    list_filter = ('status',)
+    search_fields = ('to',)
+    empty_value_display = '-пусто-'
+    # Pending bodies hold live confirmation codes.
+    exclude = ('body',)
+
+
+admin.site.register(OutboxEmail, OutboxEmailAdmin)
@@ -0,0 +1,64 @@
+"""PostgreSQL backend taking connections from an in-process pool.
+
+Set `DB_ENGINE=core.backends.pooled_postgresql`; `POOL_SIZE` and
+`POOL_TIMEOUT` of the database settings bound the pool of each process.
+"""
+
+import functools
+
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.creation import (
+    DatabaseCreation as BaseDatabaseCreation,
+)
+from psycopg2 import extensions
+
+from core.pool import PoolTimeout, close_pools, get_pool
+
+
+def reset(connection):
+    """Rolls back an unfinished transaction, False if unusable."""
+    if connection.closed:
+        return False
+    status = connection.info.transaction_status
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+    return True
+
+
+class DatabaseCreation(BaseDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections would block DROP DATABASE.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def get_pool(self, conn_params):
+        return get_pool(
+            (self.alias, repr(sorted(conn_params.items()))),
+            name=f'{self.alias}:{self.settings_dict["NAME"]}',
+            max_size=self.settings_dict.get('POOL_SIZE', 10),
+            timeout=self.settings_dict.get('POOL_TIMEOUT', 10),
+            reset=reset,
+        )
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        connect = functools.partial(
+            super().get_new_connection, conn_params)
+        try:
+            return self.pool.getconn(connect)
+        except PoolTimeout as err:
+            raise self.Database.OperationalError(str(err)) from err
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # A connection closed inside atomic() stays referenced here.
+            self.pool.putconn(
+                self.connection,
+                discard=self.errors_occurred or self.in_atomic_block)
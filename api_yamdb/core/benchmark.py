@@ -0,0 +1,440 @@
+import datetime as dt
+import functools
+import http.client
+import json
+import math
+import random
+import socket
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import django
+from api.v1.mixins import plan_queryset
+from api.v1.serializers import (
+    CommentSerializer,
+    ReviewSerializer,
+    TitleReadSerializer,
+)
+from api.v1.values import (
+    CommentValuesSerializer,
+    ReviewValuesSerializer,
+    TitleValuesSerializer,
+)
+from django.db import connection, models, transaction
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+from reviews.models import Comment, Review
+from titles.models import GenreTitle, Title, score_field
+from users.models import User
+
+WORDS = (
+    'война', 'мир', 'любовь', 'море', 'город', 'ночь', 'время', 'дорога',
+    'тайна', 'звезда', 'дом', 'сердце', 'огонь', 'память', 'зима', 'сад',
+)
+SEARCH_WORD = WORDS[0]
+
+
+def get_next_id(model):
+    return (model.objects.aggregate(last=models.Max('pk'))['last'] or 0) + 1
+
+
+def make_text(rnd, words):
+    return ' '.join(rnd.choice(WORDS) for _ in range(words)).capitalize()
+
+
+class Seeder:
+    """Generates a synthetic catalogue at a given scale through the ORM.
+
+    Rows get explicit ids, so batches are written with bulk_create on
+    every backend, and ratings are computed while generating reviews.
+    """
+
+    def __init__(self, titles, users, reviews_per_title, comments_per_review,
+                 genres=20, categories=10, seed=0):
+        self.titles = titles
+        self.users = max(users, reviews_per_title)
+        self.reviews_per_title = reviews_per_title
+        self.comments_per_review = comments_per_review
+        self.genres = genres
+        self.categories = categories
+        self.rnd = random.Random(seed)
+
+    def seed_users(self):
+        first = get_next_id(User)
+        User.objects.bulk_create(
+            User(id=pk, username=f'bench_user_{pk}',
+                 email=f'bench_user_{pk}@yamdb.fake')
+            for pk in range(first, first + self.users)
+        )
+        return list(range(first, first + self.users))
+
+    def seed_lookups(self, model, count, name):
+        first = get_next_id(model)
+        model.objects.bulk_create(
+            model(id=pk, name=f'{name} {pk}', slug=f'bench-{name}-{pk}')
+            for pk in range(first, first + count)
+        )
+        return list(range(first, first + count))
+
+    def make_titles(self, ids, category_ids):
+        return [
+            Title(id=pk, name=f'{make_text(self.rnd, 3)} {pk}',
+                  year=self.rnd.randint(1900, 2022),
+                  description=make_text(self.rnd, 12),
+                  category_id=self.rnd.choice(category_ids))
+            for pk in ids
+        ]
+
+    def seed_batch(self, title_ids, user_ids, genre_ids, category_ids,
+                   next_ids):
+        """Writes titles with their genres, reviews and comments."""
+        titles = self.make_titles(title_ids, category_ids)
+        genre_titles, reviews, comments = [], [], []
+        for title in titles:
+            for genre_id in self.rnd.sample(
+                    genre_ids, self.rnd.randint(1, min(3, len(genre_ids)))):
+                genre_titles.append(GenreTitle(
+                    id=next(next_ids['genre_title']),
+                    title_id=title.id, genre_id=genre_id))
+            for author_id in self.rnd.sample(
+                    user_ids, self.reviews_per_title):
+                review = Review(
+                    id=next(next_ids['review']), title_id=title.id,
+                    author_id=author_id, score=self.rnd.randint(1, 10),
+                    text=make_text(self.rnd, 8))
+                title.rating_sum += review.score
+                title.rating_count += 1
+                bucket = score_field(review.score)
+                setattr(title, bucket, getattr(title, bucket) + 1)
+                reviews.append(review)
+                comments += [
+                    Comment(id=next(next_ids['comment']),
+                            review_id=review.id,
+                            author_id=self.rnd.choice(user_ids),
+                            text=make_text(self.rnd, 5))
+                    for _ in range(self.comments_per_review)
+                ]
+        with transaction.atomic():
+            for model, objs in ((Title, titles), (GenreTitle, genre_titles),
+                                (Review, reviews), (Comment, comments)):
+                model.objects.bulk_create(objs)
+        return len(titles) + len(genre_titles) + len(reviews) + len(comments)
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of sorted values."""
+    index = max(0, math.ceil(share * len(values)) - 1)
+    return values[index]
+
+
+@dataclass
+class Scenario:
+    """One API call to measure; path and data may depend on iteration."""
+
+    name: str
+    path: Any
+    method: str = 'get'
+    data: Any = None
+    status: int = 200
+    setup: Optional[Callable] = None
+
+    def resolve(self, value, iteration):
+        return value(iteration) if callable(value) else value
+
+
+def get_scenarios(admin):
+    """Returns scenarios covering list, retrieve, filter and create calls."""
+    title = Title.objects.filter(rating_count__gt=0).order_by('pk').first()
+    if title is None:
+        raise LookupError('Нет произведений с отзывами, запустите '
+                          'seed_synthetic')
+    review = title.reviews.order_by('pk').first()
+    genre = title.genre.order_by('pk').first()
+    category = title.category
+    titles_url = '/api/v1/titles/'
+    reviews_url = f'{titles_url}{title.pk}/reviews/'
+
+    def clear_own_review(iteration):
+        Review.objects.filter(author=admin).delete()
+
+    return [
+        Scenario('genres-list', '/api/v1/genres/'),
+        Scenario('categories-list', '/api/v1/categories/'),
+        Scenario('titles-list', titles_url),
+        Scenario('titles-list-deep', f'{titles_url}?offset=1000'),
+        Scenario('titles-cursor', f'{titles_url}?pagination=cursor'),
+        Scenario('titles-filter-genre', f'{titles_url}?genre={genre.slug}'),
+        Scenario('titles-filter-category',
+                 f'{titles_url}?category={category.slug}'),
+        Scenario('titles-filter-year', f'{titles_url}?year={title.year}'),
+        Scenario('titles-search', f'{titles_url}?search={SEARCH_WORD}'),
+        Scenario('title-retrieve', f'{titles_url}{title.pk}/'),
+        Scenario('reviews-list', reviews_url),
+        Scenario('review-retrieve', f'{reviews_url}{review.pk}/'),
+        Scenario('comments-list', f'{reviews_url}{review.pk}/comments/'),
+        Scenario(
+            'title-create', titles_url, method='post', status=201,
+            data=lambda iteration: {
+                'name': f'Бенчмарк {iteration}', 'year': 2000,
+                'genre': [genre.slug], 'category': category.slug,
+            }),
+        Scenario(
+            'review-create', reviews_url, method='post', status=201,
+            data={'text': 'Бенчмарк', 'score': 7}, setup=clear_own_review),
+        Scenario(
+            'comment-create', f'{reviews_url}{review.pk}/comments/',
+            method='post', status=201, data={'text': 'Бенчмарк'}),
+    ]
+
+
+def run_scenario(client, scenario, requests, warmup):
+    latencies = []
+    for iteration in range(warmup + requests):
+        if scenario.setup is not None:
+            scenario.setup(iteration)
+        path = scenario.resolve(scenario.path, iteration)
+        data = scenario.resolve(scenario.data, iteration)
+        send = getattr(client, scenario.method)
+        start = time.perf_counter()
+        response = send(path, data=data, format='json')
+        elapsed = time.perf_counter() - start
+        if response.status_code != scenario.status:
+            raise AssertionError(
+                f'{scenario.name}: {path} returned {response.status_code}')
+        if iteration >= warmup:
+            latencies.append(elapsed)
+    latencies.sort()
+    return {
+        'requests': requests,
+        'rps': round(requests / sum(latencies), 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def run(requests=200, warmup=10, names=None, cached=False, report=None):
+    """Runs scenarios in-process and returns a baseline document.
+
+    Everything runs in a transaction rolled back at the end, so writes
+    made by the scenarios do not change the dataset between runs.
+    """
+    results = {}
+    # Write scenarios send far more requests than the rate limits allow.
+    overrides = {'THROTTLE_RATES': {}}
+    if not cached:
+        overrides['RESPONSE_CACHE_TIMEOUT'] = 0
+    with override_settings(**overrides), transaction.atomic():
+        admin = User.objects.create(
+            username='bench_admin', email='bench_admin@yamdb.fake',
+            role=User.ADMIN)
+        client = APIClient()
+        client.force_authenticate(admin)
+        for scenario in get_scenarios(admin):
+            if names and scenario.name not in names:
+                continue
+            results[scenario.name] = run_scenario(
+                client, scenario, requests, warmup)
+            if report is not None:
+                report(scenario.name, results[scenario.name])
+        transaction.set_rollback(True)
+    return {
+        'meta': {
+            'created': dt.datetime.now().isoformat(timespec='seconds'),
+            'vendor': connection.vendor,
+            'django': django.get_version(),
+            'cached': cached,
+            'titles': Title.objects.count(),
+            'reviews': Review.objects.count(),
+        },
+        'results': results,
+    }
+
+
+SERIALIZERS = {
+    'titles': (Title, TitleReadSerializer, TitleValuesSerializer),
+    'reviews': (Review, ReviewSerializer, ReviewValuesSerializer),
+    'comments': (Comment, CommentSerializer, CommentValuesSerializer),
+}
+
+
+def serialize_models(model, serializer_class, size):
+    serializer = serializer_class(many=True)
+    queryset = plan_queryset(model.objects.order_by('pk'), serializer)
+    return serializer_class(list(queryset[:size]), many=True).data
+
+
+def serialize_values(model, serializer_class, values_class, size):
+    serializer = values_class(serializer_class())
+    queryset = serializer.get_queryset(model.objects.order_by('pk'))
+    return serializer.to_representation(queryset[:size])
+
+
+def measure_call(function, repeat):
+    """Best CPU time of `repeat` calls and peak traced memory of one."""
+    times = []
+    for _ in range(repeat):
+        start = time.process_time()
+        function()
+        times.append(time.process_time() - start)
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+
+def measure_serializers(page_sizes=(100, 500, 1000), repeat=5):
+    """Compares model and `.values()` serialization of list pages.
+
+    CPU time includes the queries of a page, memory is the peak traced
+    while one page is built. Both paths must give equal data.
+    """
+    results = {}
+    for name, (model, serializer_class, values_class) in SERIALIZERS.items():
+        for size in page_sizes:
+            regular = functools.partial(
+                serialize_models, model, serializer_class, size)
+            fast = functools.partial(
+                serialize_values, model, serializer_class, values_class, size)
+            rows = len(fast())
+            if not rows:
+                raise LookupError('Нет данных, запустите seed_synthetic')
+            if json.dumps(regular()) != json.dumps(fast()):
+                raise AssertionError(f'{name}: representations differ')
+            result = {'rows': rows}
+            for label, function in (('model', regular), ('values', fast)):
+                cpu, peak = measure_call(function, repeat)
+                result[f'{label}_us_per_row'] = round(cpu / rows * 1e6, 2)
+                result[f'{label}_kib'] = round(peak / 1024, 1)
+            results[f'{name}-{size}'] = result
+    return results
+
+
+SERVERS = {
+    'wsgi': ('gunicorn', 'api_yamdb.wsgi:application', '--bind',
+             '127.0.0.1:{port}', '--workers', '{workers}',
+             '--log-level', 'warning'),
+    'asgi': ('uvicorn', 'api_yamdb.asgi:application', '--port', '{port}',
+             '--workers', '{workers}', '--log-level', 'warning',
+             '--no-access-log'),
+    # The production profile of gunicorn.conf.py, gthread by default.
+    'profile': ('gunicorn', '--config', 'gunicorn.conf.py', '--bind',
+                '127.0.0.1:{port}', '--workers', '{workers}',
+                '--log-level', 'warning'),
+}
+
+
+def get_read_paths():
+    """Returns read endpoints of the seeded catalogue for HTTP load."""
+    title = Title.objects.filter(rating_count__gt=0).order_by('pk').first()
+    if title is None:
+        raise LookupError('Нет произведений с отзывами, запустите '
+                          'seed_synthetic')
+    review = title.reviews.order_by('pk').first()
+    reviews_url = f'/api/v1/titles/{title.pk}/reviews/'
+    return [
+        '/api/v1/titles/', f'/api/v1/titles/{title.pk}/',
+        reviews_url, f'{reviews_url}{review.pk}/comments/',
+    ]
+
+
+def wait_for_port(port, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Server exited with {process.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server did not listen on {port} in {timeout}s')
+
+
+class Server:
+    """Runs the project under gunicorn (WSGI) or uvicorn (ASGI)."""
+
+    def __init__(self, mode, port, workers, cwd):
+        self.args = [sys.executable, '-m'] + [
+            arg.format(port=port, workers=workers) for arg in SERVERS[mode]]
+        self.port = port
+        self.cwd = cwd
+
+    def __enter__(self):
+        self.process = subprocess.Popen(self.args, cwd=self.cwd)
+        try:
+            wait_for_port(self.port, self.process)
+        except RuntimeError:
+            self.process.kill()
+            raise
+        return self
+
+    def __exit__(self, *exc_info):
+        self.process.terminate()
+        self.process.wait(timeout=30)
+
+
+def fetch(port, path):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=60)
+    start = time.perf_counter()
+    try:
+        connection.request('GET', path)
+        response = connection.getresponse()
+        response.read()
+    finally:
+        connection.close()
+    if response.status != 200:
+        raise AssertionError(f'{path} returned {response.status}')
+    return time.perf_counter() - start
+
+
+def measure_http(port, paths, requests, concurrency):
+    """Sends requests round-robin from `concurrency` parallel clients."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = sorted(executor.map(
+            lambda index: fetch(port, paths[index % len(paths)]),
+            range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'rps': round(requests / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def compare(current, baseline, threshold):
+    """Returns regressions slower than the baseline by over `threshold`."""
+    regressions = []
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            continue
+        for metric in ('p50_ms', 'p95_ms'):
+            change = result[metric] / base[metric] - 1 if base[metric] else 0
+            if change > threshold:
+                regressions.append((name, metric, base[metric],
+                                    result[metric], change))
+    return regressions
+
+
+def save(document, path):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(document, file, ensure_ascii=False, indent=2)
+        file.write('\n')
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
@@ -0,0 +1,125 @@
+import csv
+import datetime as dt
+import json
+from dataclasses import dataclass, field
+
+from django.apps import apps
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+}
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """Describes a CSV file of the `static/data` format.
+
+    `columns` lists every column the file may have, in export order,
+    `renamed` maps CSV columns to model attribute names.
+    """
+
+    name: str
+    model_label: str
+    columns: tuple
+    renamed: dict = field(default_factory=dict)
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def filename(self):
+        return f'{self.name}.csv'
+
+    def get_attname(self, column):
+        return self.renamed.get(column, column)
+
+    def get_field(self, column):
+        return self.model._meta.get_field(self.get_attname(column))
+
+    def iter_values(self, chunk_size=2000):
+        """Yields rows in `columns` order through a server-side cursor."""
+        return self.model.objects.order_by('pk').values_list(
+            *(self.get_attname(column) for column in self.columns)
+        ).iterator(chunk_size=chunk_size)
+
+
+DATASETS = (
+    Dataset(
+        'users', 'users.User',
+        ('id', 'username', 'email', 'role', 'bio', 'first_name',
+         'last_name'),
+    ),
+    Dataset('category', 'titles.Category', ('id', 'name', 'slug')),
+    Dataset('genre', 'titles.Genre', ('id', 'name', 'slug')),
+    Dataset(
+        'titles', 'titles.Title',
+        ('id', 'name', 'year', 'description', 'category'),
+        {'category': 'category_id'},
+    ),
+    Dataset(
+        'genre_title', 'titles.GenreTitle', ('id', 'title_id', 'genre_id'),
+    ),
+    Dataset(
+        'review', 'reviews.Review',
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        {'author': 'author_id'},
+    ),
+    Dataset(
+        'comments', 'reviews.Comment',
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        {'author': 'author_id'},
+    ),
+)
+
+
+def get_dataset(name):
+    for dataset in DATASETS:
+        if dataset.name == name:
+            return dataset
+    raise LookupError(f'Unknown dataset {name}')
+
+
+class Echo:
+    """File-like object returning what is written, for streaming csv."""
+
+    def write(self, value):
+        return value
+
+
+def to_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dt.date, dt.datetime)):
+        return value.isoformat()
+    return value
+
+
+def render_csv(dataset, rows):
+    """Yields CSV lines readable by `load_example_data`."""
+    writer = csv.writer(Echo(), lineterminator='\n')
+    yield writer.writerow(dataset.columns)
+    for row in rows:
+        yield writer.writerow([to_text(value) for value in row])
+
+
+def render_ndjson(dataset, rows):
+    """Yields one JSON object per line with the CSV column names."""
+    for row in rows:
+        yield json.dumps(
+            dict(zip(dataset.columns, row)),
+            ensure_ascii=False,
+            default=to_text
+        ) + '\n'
+
+
+RENDERERS = {
+    'csv': render_csv,
+    'ndjson': render_ndjson,
+}
+
+
+def export(dataset, export_format, chunk_size=2000):
+    """Streams a dataset in the given format with flat memory usage."""
+    return RENDERERS[export_format](dataset, dataset.iter_values(chunk_size))
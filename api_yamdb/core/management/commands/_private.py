@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.color import no_style
+from django.db import connection
+
+
+def batched(iterable, size):
+    """Yields lists of at most `size` items without reading ahead."""
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Progress:
+    """Reports processed rows and throughput of a long running command."""
+
+    def __init__(self, command, label, interval=1.0):
+        self.command = command
+        self.label = label
+        self.interval = interval
+        self.rows = 0
+        self.started = self.reported = time.monotonic()
+
+    @property
+    def rate(self):
+        elapsed = time.monotonic() - self.started
+        return self.rows / elapsed if elapsed else 0.0
+
+    def add(self, count):
+        self.rows += count
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self.command.stdout.write(self.command.style.NOTICE(
+                f'{self.label}: {self.rows} rows, {self.rate:.0f} rows/s...'))
+
+    def done(self):
+        self.command.stdout.write(self.command.style.NOTICE(
+            f'{self.label} done: {self.rows} rows, {self.rate:.0f} rows/s'))
+
+
+def reset_sequences(*models):
+    """Moves id sequences past rows inserted with explicit ids."""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
@@ -0,0 +1,79 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core import benchmark
+
+
+def get_default_path():
+    return os.path.join(settings.BASE_DIR, 'benchmarks',
+                        f'baseline-{connection.vendor}.json')
+
+
+class Command(BaseCommand):
+    """Measures API throughput and latency against a recorded baseline."""
+
+    help = "Benchmarks the v1 API in-process and compares to a baseline"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument(
+            '--scenario', action='append', dest='scenarios',
+            help='Run only the named scenario, may be repeated.')
+        parser.add_argument(
+            '--cached', action='store_true',
+            help='Keep the response cache on, it is off by default.')
+        parser.add_argument(
+            '--save', nargs='?', const='', metavar='PATH',
+            help='Store results as a baseline, by default in '
+                 'benchmarks/baseline-<database>.json.')
+        parser.add_argument(
+            '--compare', nargs='?', const='', metavar='PATH',
+            help='Fail when slower than the baseline by over --threshold.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.2,
+            help='Allowed p50/p95 latency growth, 0.2 is 20%%.')
+
+    def handle(self, *args, **options):
+        baseline = None
+        if options['compare'] is not None:
+            compare_path = options['compare'] or get_default_path()
+            if not os.path.exists(compare_path):
+                raise CommandError(f'Baseline {compare_path} not found')
+            baseline = benchmark.load(compare_path)
+
+        self.stdout.write(
+            f'{"scenario":<24}{"rps":>10}{"p50 ms":>10}'
+            f'{"p95 ms":>10}{"p99 ms":>10}')
+        try:
+            document = benchmark.run(
+                options['requests'], options['warmup'],
+                options['scenarios'], options['cached'], self.report)
+        except (LookupError, AssertionError) as err:
+            raise CommandError(err)
+
+        if options['save'] is not None:
+            path = options['save'] or get_default_path()
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            benchmark.save(document, path)
+            self.stdout.write(self.style.SUCCESS(f'Baseline saved to {path}'))
+
+        if baseline is None:
+            return
+        regressions = benchmark.compare(
+            document, baseline, options['threshold'])
+        for name, metric, before, after, change in regressions:
+            self.stdout.write(self.style.ERROR(
+                f'{name} {metric}: {before} -> {after} (+{change:.0%})'))
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} regression(s) over the baseline')
+        self.stdout.write(self.style.SUCCESS('No regressions'))
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:<24}{result["rps"]:>10}{result["p50_ms"]:>10}'
+            f'{result["p95_ms"]:>10}{result["p99_ms"]:>10}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Compares model serializers with `.values()` based ones."""
+
+    help = "Measures CPU time per row and memory of list serialization"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size', type=int, action='append',
+            help='Rows per page, may be repeated (default 100, 500, 1000).')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument(
+            '--save', metavar='PATH', help='Store results as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            results = benchmark.measure_serializers(
+                options['page_size'] or (100, 500, 1000), options['repeat'])
+        except (LookupError, AssertionError) as err:
+            raise CommandError(err)
+        self.stdout.write(
+            f'{"page":<16}{"rows":>6}{"model us/row":>14}'
+            f'{"values us/row":>15}{"model KiB":>11}{"values KiB":>12}')
+        for name, result in results.items():
+            self.stdout.write(
+                f'{name:<16}{result["rows"]:>6}'
+                f'{result["model_us_per_row"]:>14}'
+                f'{result["values_us_per_row"]:>15}'
+                f'{result["model_kib"]:>11}{result["values_kib"]:>12}')
+        if options['save']:
+            benchmark.save({'results': results}, options['save'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Results saved to {options["save"]}'))
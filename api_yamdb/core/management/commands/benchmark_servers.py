@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import benchmark
+
+
+class Command(BaseCommand):
+    """Compares WSGI and ASGI deployments under limited concurrency."""
+
+    help = "Benchmarks gunicorn (WSGI) against uvicorn (ASGI) over HTTP"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument(
+            '--concurrency', type=int, action='append',
+            help='Parallel clients, may be repeated (default 1, 8, 32).')
+        parser.add_argument(
+            '--workers', type=int, default=2,
+            help='Server worker processes in every mode.')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--mode', choices=sorted(benchmark.SERVERS), action='append',
+            help='Server mode to run, all of them by default.')
+        parser.add_argument(
+            '--save', metavar='PATH', help='Store results as JSON.')
+
+    def handle(self, *args, **options):
+        try:
+            paths = benchmark.get_read_paths()
+        except LookupError as err:
+            raise CommandError(err)
+        levels = options['concurrency'] or [1, 8, 32]
+        results = {}
+        self.stdout.write(
+            f'{"mode":<8}{"clients":>8}{"rps":>10}{"p50 ms":>10}'
+            f'{"p95 ms":>10}{"p99 ms":>10}')
+        for mode in options['mode'] or sorted(benchmark.SERVERS):
+            server = benchmark.Server(
+                mode, options['port'], options['workers'], settings.BASE_DIR)
+            try:
+                with server:
+                    # Warms up imports and connections of every worker.
+                    benchmark.measure_http(
+                        options['port'], paths, 4 * options['workers'],
+                        options['workers'])
+                    for level in levels:
+                        result = benchmark.measure_http(
+                            options['port'], paths, options['requests'],
+                            level)
+                        results[f'{mode}-c{level}'] = result
+                        self.stdout.write(
+                            f'{mode:<8}{level:>8}{result["rps"]:>10}'
+                            f'{result["p50_ms"]:>10}{result["p95_ms"]:>10}'
+                            f'{result["p99_ms"]:>10}')
+            except (RuntimeError, AssertionError) as err:
+                raise CommandError(f'{mode}: {err}')
+
+        if options['save']:
+            benchmark.save({
+                'meta': {'workers': options['workers'], 'paths': paths},
+                'results': results,
+            }, options['save'])
+            self.stdout.write(
+                self.style.SUCCESS(f'Results saved to {options["save"]}'))
@@ -0,0 +1,138 @@
+import json
+import re
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.http import QueryDict
+from django.urls import resolve
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from reviews.models import Comment
+from titles.models import Title
+
+SQLITE_SCAN = re.compile(r'\bSCAN (?:TABLE )?(\w+)')
+
+
+def get_endpoints():
+    """Returns API paths covering the main read queries of every view."""
+    title = Title.objects.order_by('pk').select_related('category').first()
+    comment = Comment.objects.order_by('pk').select_related('review').first()
+    endpoints = ['/api/v1/genres/', '/api/v1/categories/', '/api/v1/titles/']
+    if title is not None:
+        endpoints += [
+            f'/api/v1/titles/{title.pk}/',
+            f'/api/v1/titles/?year={title.year}',
+            f'/api/v1/titles/{title.pk}/reviews/',
+        ]
+        if title.category is not None:
+            endpoints.append(
+                f'/api/v1/titles/?category={title.category.slug}')
+        genre = title.genre.first()
+        if genre is not None:
+            endpoints.append(f'/api/v1/titles/?genre={genre.slug}')
+    if comment is not None:
+        review = comment.review
+        endpoints.append(f'/api/v1/titles/{review.title_id}/reviews/'
+                         f'{review.pk}/comments/')
+    return endpoints
+
+
+def get_main_queryset(path):
+    """Builds the queryset a GET of the path paginates or looks up."""
+    url = urlsplit(path)
+    match = resolve(url.path)
+    view = match.func.cls(**match.func.initkwargs)
+    view.action_map = match.func.actions
+    view.action = view.action_map['get']
+    view.args, view.kwargs, view.format_kwarg = (), match.kwargs, None
+    view.request = view.initialize_request(
+        APIRequestFactory().get(url.path, QueryDict(url.query)))
+
+    queryset = view.filter_queryset(view.get_queryset())
+    if view.action == 'retrieve':
+        lookup = view.lookup_url_kwarg or view.lookup_field
+        return queryset.filter(**{view.lookup_field: match.kwargs[lookup]})
+    ordering = getattr(view, 'cursor_ordering', None)
+    if ordering:
+        queryset = queryset.order_by(*ordering)
+    return queryset[:api_settings.PAGE_SIZE]
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from iter_plan_nodes(child)
+
+
+def explain(queryset):
+    """Returns the plan text and tables read by a sequential scan."""
+    if connection.vendor != 'postgresql':
+        plan = queryset.explain()
+        return plan, sorted({match.group(1) for line in plan.splitlines()
+                             for match in SQLITE_SCAN.finditer(line)
+                             if 'USING' not in line})
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    root = plan[0]['Plan']
+    return json.dumps(plan, indent=2), sorted({
+        node['Relation Name'] for node in iter_plan_nodes(root)
+        if node['Node Type'] == 'Seq Scan'
+    })
+
+
+def get_table_rows(table):
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class '
+                'WHERE oid = %s::regclass', [table])
+            rows, = cursor.fetchone()
+            if rows >= 0:
+                return rows
+        cursor.execute(f'SELECT COUNT(*) FROM {qn(table)}')
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    """Checks endpoint queries for sequential scans of large tables."""
+
+    help = "Runs EXPLAIN on the main query of each API endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=10000,
+            help='Flag sequential scans of tables with at least this '
+                 'many rows.')
+        parser.add_argument(
+            '--fail', action='store_true',
+            help='Exit with an error when a scan is flagged, e.g. in CI.')
+
+    def handle(self, *args, **options):
+        flagged = 0
+        for path in get_endpoints():
+            plan, tables = explain(get_main_queryset(path))
+            if options['verbosity'] > 1:
+                self.stdout.write(plan)
+            scans = [
+                (table, rows) for table in tables
+                for rows in [get_table_rows(table)]
+                if rows >= options['min_rows']
+            ]
+            if not scans:
+                self.stdout.write(self.style.SUCCESS(f'OK   {path}'))
+                continue
+            flagged += 1
+            details = ', '.join(f'{table} (~{rows} rows)'
+                                for table, rows in scans)
+            self.stdout.write(self.style.WARNING(
+                f'SEQ  {path}: sequential scan of {details}'))
+
+        if flagged and options['fail']:
+            raise CommandError(
+                f'{flagged} endpoint(s) scan large tables sequentially')
@@ -0,0 +1,47 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.datasets import DATASETS, RENDERERS, export, get_dataset
+
+from ._private import Progress
+
+
+class Command(BaseCommand):
+    """Exports catalogue, reviews and comments to CSV or NDJSON files."""
+
+    help = "Exports data in the /static/data format"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format', choices=sorted(RENDERERS), default='csv',
+            help='Output format.')
+        parser.add_argument(
+            '--path', default='.',
+            help='Directory for the exported files.')
+        parser.add_argument(
+            '--dataset', action='append',
+            choices=[dataset.name for dataset in DATASETS],
+            help='Dataset to export, may be repeated. Defaults to all.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched from the database cursor at once.')
+
+    def handle(self, *args, **options):
+        datasets = DATASETS
+        if options['dataset']:
+            datasets = [get_dataset(name) for name in options['dataset']]
+        os.makedirs(options['path'], exist_ok=True)
+
+        for dataset in datasets:
+            path = os.path.join(
+                options['path'], f'{dataset.name}.{options["format"]}')
+            progress = Progress(self, path)
+            with open(path, 'w', encoding='utf-8', newline='') as output:
+                for line in export(dataset, options['format'],
+                                   options['chunk_size']):
+                    output.write(line)
+                    progress.add(1)
+            progress.done()
+
+        self.stdout.write(self.style.SUCCESS('Export done.'))
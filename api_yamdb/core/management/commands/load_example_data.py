@@ -1,114 +1,224 @@
 import csv
+import datetime as dt
+import io
 import os
 
-from django.core.management.base import BaseCommand, CommandError
+from api.cache import invalidate_all
 from django.conf import settings
-from titles.models import Category, Genre, GenreTitle, Title
-from reviews.models import Comment, Review
-from users.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.utils import timezone
+from titles.models import Title
+
+from core.datasets import DATASETS
 
+from ._private import Progress, batched, reset_sequences
 
 ALREDY_LOADED_ERROR_MESSAGE = """
-If you need to reload the example data from the CSV file,
-first delete the db.sqlite3 file to destroy the database.
-Then, run `python manage.py migrate` for a new empty
-database with tables."""
+The database already has titles. To import the CSV files again
+and update the existing rows by id, run the command with --upsert.
+To start from scratch, recreate the database and run
+`python manage.py migrate` for a new empty database with tables."""
+
+TEXT_FIELDS = (models.CharField, models.TextField)
+
+
+def get_default(field):
+    if getattr(field, 'auto_now', False) or getattr(
+            field, 'auto_now_add', False):
+        return timezone.now()
+    return field.get_default()
+
+
+class OrmWriter:
+    """Writes batches with bulk_create, portable to every backend."""
+
+    def __init__(self, dataset, columns, upsert):
+        self.model = dataset.model
+        self.fields = [dataset.get_field(column) for column in columns]
+        self.upsert = upsert
+        # bulk_create overwrites auto_now_add values, they are restored
+        # from the file by a following bulk_update.
+        self.restored = [
+            field.attname for field in self.fields
+            if getattr(field, 'auto_now_add', False)
+            or getattr(field, 'auto_now', False)
+        ]
+
+    def to_python(self, field, value):
+        if value == '' and not isinstance(field, TEXT_FIELDS):
+            return None
+        value = field.to_python(value)
+        if (isinstance(value, dt.datetime)
+                and timezone.is_aware(value) and not settings.USE_TZ):
+            value = timezone.make_naive(value, timezone.utc)
+        return value
+
+    def write(self, rows):
+        objs = [
+            self.model(**{
+                field.attname: self.to_python(field, value)
+                for field, value in zip(self.fields, row)
+            })
+            for row in rows
+        ]
+        existing = set()
+        if self.upsert:
+            existing = set(self.model.objects.filter(
+                pk__in=[obj.pk for obj in objs]
+            ).values_list('pk', flat=True))
+            update_fields = [field.attname for field in self.fields
+                             if not field.primary_key]
+            if existing and update_fields:
+                self.model.objects.bulk_update(
+                    [obj for obj in objs if obj.pk in existing],
+                    update_fields
+                )
+        self.create([obj for obj in objs if obj.pk not in existing])
+
+    def create(self, objs):
+        # bulk_create stamps auto_now fields on the objects themselves.
+        values = [[getattr(obj, name) for name in self.restored]
+                  for obj in objs]
+        self.model.objects.bulk_create(objs)
+        if objs and self.restored:
+            for obj, row in zip(objs, values):
+                for name, value in zip(self.restored, row):
+                    setattr(obj, name, value)
+            self.model.objects.bulk_update(objs, self.restored)
+
+    def close(self):
+        pass
+
+
+class CopyWriter:
+    """Streams batches through COPY into a temporary table on PostgreSQL.
+
+    Every batch is moved into the target table with one
+    INSERT ... SELECT, which also casts the text columns and fills
+    the model defaults of columns missing from the file.
+    """
+
+    def __init__(self, dataset, columns, upsert):
+        model = dataset.model
+        qn = connection.ops.quote_name
+        self.cursor = connection.cursor()
+        self.temp_table = qn(f'import_{model._meta.db_table}')
+        self.copy_columns = ', '.join(qn(column) for column in columns)
+        self.cursor.execute(
+            f'CREATE TEMP TABLE {self.temp_table} ('
+            + ', '.join(f'{qn(column)} text' for column in columns)
+            + ') ON COMMIT DROP'
+        )
+
+        fields = [dataset.get_field(column) for column in columns]
+        targets, selects = [], []
+        for column, field in zip(columns, fields):
+            targets.append(qn(field.column))
+            value = qn(column)
+            if not isinstance(field, TEXT_FIELDS):
+                value = f'NULLIF({value}, \'\')'
+            selects.append(f'{value}::{field.cast_db_type(connection)}')
+        self.params = []
+        for field in model._meta.concrete_fields:
+            if field in fields:
+                continue
+            targets.append(qn(field.column))
+            selects.append('%s')
+            self.params.append(
+                field.get_db_prep_save(get_default(field), connection))
+
+        self.insert_sql = (
+            f'INSERT INTO {qn(model._meta.db_table)} ({", ".join(targets)}) '
+            f'SELECT {", ".join(selects)} FROM {self.temp_table}'
+        )
+        if upsert:
+            updates = ', '.join(
+                f'{qn(field.column)} = EXCLUDED.{qn(field.column)}'
+                for field in fields if not field.primary_key
+            )
+            self.insert_sql += f' ON CONFLICT ({qn(model._meta.pk.column)}) '
+            self.insert_sql += (f'DO UPDATE SET {updates}' if updates
+                                else 'DO NOTHING')
+
+    def write(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        self.cursor.copy_expert(
+            f'COPY {self.temp_table} ({self.copy_columns}) FROM STDIN '
+            f'WITH (FORMAT csv, FORCE_NOT_NULL ({self.copy_columns}))',
+            buffer
+        )
+        self.cursor.execute(self.insert_sql, self.params)
+        self.cursor.execute(f'TRUNCATE {self.temp_table}')
+
+    def close(self):
+        self.cursor.close()
 
 
 class Command(BaseCommand):
-    """Provides loading example data form /static/data to DB."""
+    """Provides streaming loading of example data form /static/data to DB."""
 
     help = "Loads example data from /static/data"
     requires_migrations_checks = True
-    output_transaction = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=os.path.join(settings.BASE_DIR, 'static', 'data'),
+            help='Directory with the CSV files.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows read and written at once, bounds the memory usage.')
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Update rows with existing ids instead of failing.')
+        parser.add_argument(
+            '--no-copy', action='store_true',
+            help='Use bulk_create even on PostgreSQL.')
 
     def handle(self, *args, **options):
-        if Title.objects.exists():
+        if not options['upsert'] and Title.objects.exists():
             self.stdout.write(self.style.ERROR(ALREDY_LOADED_ERROR_MESSAGE))
             return
 
         self.stdout.write(self.style.NOTICE('Start loading...'))
 
         try:
-            self._load_data()
+            for dataset in DATASETS:
+                self._load_dataset(dataset, options)
+            Title.objects.refresh_ratings()
+            invalidate_all()
         except Exception as err:
             raise CommandError(
                 f'Failed load {err.args}, reason: {err}')
 
         self.stdout.write(self.style.SUCCESS('Loading done.'))
 
-    def _load_data(self):
-        def get_file_path(filename):
-            return os.path.join(settings.BASE_DIR, 'static', 'data', filename)
-
-        categories = {}
-        genres = {}
-        titles = {}
-        reviews = {}
-        users = {}
-
-        path = get_file_path('users.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            for row in csv.DictReader(csvfile):
-                obj = User(**row)
-                obj.save()
-                users[obj.id] = obj
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
-
-        path = get_file_path('category.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            for row in csv.DictReader(csvfile):
-                obj = Category(**row)
-                categories[obj.id] = obj
-            Category.objects.bulk_create(objs=categories.values())
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
-
-        path = get_file_path('genre.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            for row in csv.DictReader(csvfile):
-                obj = Genre(**row)
-                genres[obj.id] = obj
-            Genre.objects.bulk_create(objs=genres.values())
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
-
-        path = get_file_path('titles.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            for row in csv.DictReader(csvfile):
-                row['category'] = categories[row['category']]
-                obj = Title(**row)
-                titles[obj.id] = obj
-            Title.objects.bulk_create(objs=titles.values())
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
-
-        path = get_file_path('genre_title.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            objs = [
-                GenreTitle(
-                    id=row['id'],
-                    genre=genres[row['genre_id']],
-                    title=titles[row['title_id']]
-                )
-                for row in csv.DictReader(csvfile)
-            ]
-            GenreTitle.objects.bulk_create(objs=objs)
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
+    def _load_dataset(self, dataset, options):
+        path = os.path.join(options['path'], dataset.filename)
+        if not os.path.exists(path):
+            self.stdout.write(self.style.WARNING(f'{path} not found, skipped'))
+            return
 
-        path = get_file_path('review.csv')
-        with open(path, encoding='utf-8', newline='') as csvfile:
-            for row in csv.DictReader(csvfile):
-                row['title'] = titles[row['title_id']]
-                row['author'] = users[row['author']]
-                obj = Review(**row)
-                reviews[obj.id] = obj
-            Review.objects.bulk_create(objs=reviews.values())
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
-
-        path = get_file_path('comments.csv')
+        use_copy = connection.vendor == 'postgresql' and not options['no_copy']
+        writer_class = CopyWriter if use_copy else OrmWriter
+        progress = Progress(self, path)
         with open(path, encoding='utf-8', newline='') as csvfile:
-            objs = []
-            for row in csv.DictReader(csvfile):
-                row['review'] = reviews[row['review_id']]
-                row['author'] = users[row['author']]
-                objs.append(Comment(**row))
-            Comment.objects.bulk_create(objs=objs)
-        self.stdout.write(self.style.NOTICE(f'{path} done...'))
+            reader = csv.reader(csvfile)
+            header = next(reader)
+            unknown = set(header) - set(dataset.columns)
+            if unknown:
+                raise CommandError(
+                    f'{path}: unexpected columns {sorted(unknown)}')
+            if 'id' not in header:
+                raise CommandError(f'{path}: missing id column')
+            with transaction.atomic():
+                writer = writer_class(dataset, header, options['upsert'])
+                for rows in batched(reader, options['batch_size']):
+                    writer.write(rows)
+                    progress.add(len(rows))
+                writer.close()
+                reset_sequences(dataset.model)
+        progress.done()
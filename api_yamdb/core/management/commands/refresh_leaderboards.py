@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+from titles.leaderboards import BOARD_SCOPES, refresh_leaderboards
+
+
+class Command(BaseCommand):
+    """Rebuilds precomputed top and trending leaderboards."""
+
+    help = "Recomputes title leaderboards"
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--board', action='append', choices=tuple(BOARD_SCOPES),
+            help='Board to rebuild, every board by default. Repeatable.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep rebuilding the boards instead of exiting.')
+        parser.add_argument(
+            '--interval', type=float, default=600.0,
+            help='Seconds to wait between rebuilds.')
+
+    def handle(self, *args, **options):
+        boards = options['board'] or tuple(BOARD_SCOPES)
+        while True:
+            self.stdout.write(self.style.NOTICE('Start ranking...'))
+            counts = refresh_leaderboards(boards)
+            self.stdout.write(self.style.SUCCESS(
+                'Leaderboards done: ' + ', '.join(
+                    f'{board} {count} entries'
+                    for board, count in counts.items())))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,24 @@
+from api.cache import invalidate_all
+from django.core.management.base import BaseCommand
+from titles.models import Title
+
+
+class Command(BaseCommand):
+    """Reconciles denormalized title ratings with reviews."""
+
+    help = "Recomputes title ratings from reviews and fixes mismatches"
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of titles locked and recomputed at once.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE('Start reconciling...'))
+        fixed = Title.objects.refresh_ratings(
+            batch_size=options['batch_size'])
+        if fixed:
+            invalidate_all()
+        self.stdout.write(self.style.SUCCESS(
+            f'Reconciling done, {fixed} titles fixed.'))
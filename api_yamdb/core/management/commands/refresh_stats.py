@@ -0,0 +1,36 @@
+import time
+
+from api.cache import refresh_rating_prior
+from django.core.management.base import BaseCommand
+from titles.models import CategoryStats, GenreStats
+
+
+class Command(BaseCommand):
+    """Recomputes genre and category rating rollups."""
+
+    help = "Rebuilds genre/category rating statistics from title histograms"
+    requires_migrations_checks = True
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep rebuilding the rollups instead of exiting.')
+        parser.add_argument(
+            '--interval', type=float, default=3600.0,
+            help='Seconds to wait between rebuilds.')
+
+    def handle(self, *args, **options):
+        while True:
+            self.refresh()
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self):
+        self.stdout.write(self.style.NOTICE('Start rolling up...'))
+        genres = GenreStats.objects.refresh()
+        categories = CategoryStats.objects.refresh()
+        prior = refresh_rating_prior()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rollups done: {genres} genres, {categories} categories, '
+            f'mean score {prior if prior is None else round(prior, 2)}.'))
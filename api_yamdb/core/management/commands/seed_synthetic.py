@@ -0,0 +1,60 @@
+from itertools import count
+
+from api.cache import invalidate_all
+from django.core.management.base import BaseCommand
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, GenreTitle, Title
+from users.models import User
+
+from core.benchmark import Seeder, get_next_id
+
+from ._private import Progress, reset_sequences
+
+
+class Command(BaseCommand):
+    """Seeds a synthetic catalogue of a given scale for benchmarks."""
+
+    help = "Generates synthetic users, titles, reviews and comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--titles', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--reviews-per-title', type=int, default=20)
+        parser.add_argument('--comments-per-review', type=int, default=1)
+        parser.add_argument('--genres', type=int, default=20)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Reviews generated and written at once.')
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Random seed, the same seed gives the same dataset.')
+
+    def handle(self, *args, **options):
+        seeder = Seeder(
+            options['titles'], options['users'],
+            options['reviews_per_title'], options['comments_per_review'],
+            options['genres'], options['categories'], options['seed'])
+        user_ids = seeder.seed_users()
+        genre_ids = seeder.seed_lookups(Genre, seeder.genres, 'genre')
+        category_ids = seeder.seed_lookups(
+            Category, seeder.categories, 'category')
+
+        next_ids = {
+            'genre_title': count(get_next_id(GenreTitle)),
+            'review': count(get_next_id(Review)),
+            'comment': count(get_next_id(Comment)),
+        }
+        first = get_next_id(Title)
+        titles_per_batch = max(
+            1, options['batch_size'] // max(1, seeder.reviews_per_title))
+        progress = Progress(self, 'synthetic data')
+        for start in range(first, first + seeder.titles, titles_per_batch):
+            stop = min(start + titles_per_batch, first + seeder.titles)
+            progress.add(seeder.seed_batch(
+                range(start, stop), user_ids, genre_ids, category_ids,
+                next_ids))
+        reset_sequences(User, Genre, Category, Title, GenreTitle, Review,
+                        Comment)
+        invalidate_all()
+        progress.done()
@@ -0,0 +1,110 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.models import OutboxEmail
+
+
+class Command(BaseCommand):
+    """Delivers queued emails over one reused mail connection per batch."""
+
+    help = "Sends pending emails from the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Emails locked and sent over one connection.')
+        parser.add_argument(
+            '--loop', action='store_true',
+            help='Keep polling the outbox instead of exiting when empty.')
+        parser.add_argument(
+            '--interval', type=float, default=2.0,
+            help='Seconds to wait between polls of an empty outbox.')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = self.send_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(self.style.NOTICE(
+                    f'Sent {sent}, failed {failed}'))
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def send_batch(self, batch_size):
+        """Sends one batch, returns numbers of sent and failed emails.
+
+        Rows stay locked until the batch is done, so several workers
+        can run side by side without sending an email twice.
+        """
+        sent = failed = 0
+        with transaction.atomic():
+            emails = list(
+                OutboxEmail.objects.select_for_update(skip_locked=True)
+                .filter(status=OutboxEmail.PENDING,
+                        next_attempt_at__lte=timezone.now())
+                .order_by('next_attempt_at')[:batch_size]
+            )
+            if not emails:
+                return sent, failed
+
+            connection = get_connection()
+            try:
+                connection.open()
+            except Exception as err:
+                # The whole batch is retried later, like failed sends.
+                for email in emails:
+                    email.attempts += 1
+                    self.record_error(email, err)
+                failed = len(emails)
+            else:
+                try:
+                    for email in emails:
+                        if self.send(connection, email):
+                            sent += 1
+                        else:
+                            failed += 1
+                finally:
+                    connection.close()
+            OutboxEmail.objects.bulk_update(
+                emails,
+                ('status', 'attempts', 'next_attempt_at', 'last_error',
+                 'sent_at', 'body')
+            )
+        return sent, failed
+
+    def send(self, connection, email):
+        message = EmailMessage(
+            email.subject, email.body, email.from_email, [email.to],
+            connection=connection
+        )
+        email.attempts += 1
+        try:
+            message.send()
+        except Exception as err:
+            self.record_error(email, err)
+            return False
+        email.status = OutboxEmail.SENT
+        email.sent_at = timezone.now()
+        email.last_error = ''
+        # The body holds a live confirmation code, it is kept only
+        # while the email may still be sent.
+        email.body = ''
+        return True
+
+    def record_error(self, email, err):
+        """Schedules the next attempt with backoff, or gives up."""
+        email.last_error = repr(err)
+        if email.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            email.status = OutboxEmail.FAILED
+            email.body = ''
+        else:
+            email.next_attempt_at = timezone.now() + timedelta(
+                seconds=settings.OUTBOX_RETRY_DELAY
+                * 2 ** (email.attempts - 1))
@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+
+from api.metrics import BUCKETS, Histogram
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+class PoolTimeout(Exception):
+    """No connection was released within the pool timeout."""
+
+
+class ConnectionPool:
+    """Thread-safe pool of DB-API connections with usage statistics.
+
+    Connections are opened lazily up to `max_size`; a checkout beyond
+    that waits for a release until `timeout` seconds pass.
+    """
+
+    def __init__(self, name, max_size, timeout, reset):
+        self.name = name
+        self.max_size = max_size
+        self.timeout = timeout
+        self.reset = reset
+        self.condition = threading.Condition()
+        self.idle = []
+        self.size = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time = Histogram(BUCKETS)
+
+    @property
+    def in_use(self):
+        return self.size - len(self.idle)
+
+    def getconn(self, connect):
+        """Returns an idle connection or one made by `connect()`."""
+        start = time.perf_counter()
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    self.timeouts += 1
+                    raise PoolTimeout(
+                        f'Pool {self.name} has no free connection '
+                        f'after {self.timeout}s')
+                self.condition.wait(remaining)
+            self.checkouts += 1
+            self.wait_time.observe(time.perf_counter() - start)
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+        try:
+            return connect()
+        except BaseException:
+            self.release_slot()
+            raise
+
+    def putconn(self, connection, discard=False):
+        """Returns a connection, closing it if it can not be reused."""
+        try:
+            usable = not discard and self.reset(connection)
+        except Exception:
+            usable = False
+        if usable:
+            with self.condition:
+                self.idle.append(connection)
+                self.condition.notify()
+            return
+        self.release_slot()
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def release_slot(self):
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def close_idle(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.size -= len(idle)
+            self.condition.notify_all()
+        for connection in idle:
+            connection.close()
+
+
+def get_pool(key, name, max_size, timeout, reset):
+    """Returns the pool for `key` of this process, created on first use."""
+    key = (os.getpid(), *key)
+    with pools_lock:
+        if key not in pools:
+            pools[key] = ConnectionPool(name, max_size, timeout, reset)
+        return pools[key]
+
+
+def get_pools():
+    pid = os.getpid()
+    return [pool for key, pool in pools.items() if key[0] == pid]
+
+
+def close_pools():
+    """Closes idle connections of every pool, e.g. before dropping a DB."""
+    for pool in get_pools():
+        pool.close_idle()
+
+
+def render_metrics():
+    """Returns pool gauges, counters and wait time in Prometheus format."""
+    lines = [
+        '# HELP db_pool_max_size Connections a pool may open.',
+        '# TYPE db_pool_max_size gauge',
+        '# HELP db_pool_connections Open pool connections by state.',
+        '# TYPE db_pool_connections gauge',
+        '# HELP db_pool_checkouts_total Connections handed out.',
+        '# TYPE db_pool_checkouts_total counter',
+        '# HELP db_pool_timeouts_total Checkouts failed on timeout.',
+        '# TYPE db_pool_timeouts_total counter',
+        '# HELP db_pool_wait_seconds Time waited for a connection.',
+        '# TYPE db_pool_wait_seconds histogram',
+    ]
+    for pool in sorted(get_pools(), key=lambda pool: pool.name):
+        label = f'pool="{pool.name}"'
+        with pool.condition:
+            lines += [
+                f'db_pool_max_size{{{label}}} {pool.max_size}',
+                f'db_pool_connections{{{label},state="idle"}} '
+                f'{len(pool.idle)}',
+                f'db_pool_connections{{{label},state="in_use"}} '
+                f'{pool.in_use}',
+                f'db_pool_checkouts_total{{{label}}} {pool.checkouts}',
+                f'db_pool_timeouts_total{{{label}}} {pool.timeouts}',
+                *pool.wait_time.render('db_pool_wait_seconds', label),
+            ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,42 @@
+"""Gunicorn serving profile, every value can be overridden from env."""
+
+import multiprocessing
+import os
+
+
+def env_int(name, default):
+    return int(os.getenv(name, default=default))
+
+
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', default='gthread')
+# Uvicorn workers serve the ASGI application, the others WSGI.
+if 'uvicorn' in worker_class.lower():
+    wsgi_app = 'api_yamdb.asgi:application'
+else:
+    wsgi_app = 'api_yamdb.wsgi:application'
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = env_int('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1)
+# Gunicorn silently switches sync workers to gthread when threads > 1.
+threads = 1 if worker_class == 'sync' else env_int('GUNICORN_THREADS', 4)
+timeout = env_int('GUNICORN_TIMEOUT', 30)
+graceful_timeout = env_int('GUNICORN_GRACEFUL_TIMEOUT', 30)
+keepalive = env_int('GUNICORN_KEEPALIVE', 5)
+
+# Recycles workers to bound memory growth, jitter avoids restarting
+# all of them at once.
+max_requests = env_int('GUNICORN_MAX_REQUESTS', 1000)
+max_requests_jitter = env_int('GUNICORN_MAX_REQUESTS_JITTER', 100)
+
+# Imports Django once in the master, workers fork with it loaded.
+preload_app = os.getenv('GUNICORN_PRELOAD', default='True') == 'True'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', default=None)
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', default='info')
+
+
+def post_fork(server, worker):
+    # Connections opened while preloading must not be shared by workers.
+    from django.db import connections
+
+    connections.close_all()
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_pub_date_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='comment',
+            name='comment_review_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_title_updated_at_idx',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='review',
+            name='updated_at',
+        ),
+    ]
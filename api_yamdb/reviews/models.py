@@ -1,6 +1,6 @@
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
 from titles.models import Title
 
 User = get_user_model()
@@ -44,6 +44,12 @@ class Review(TextPubDateModel):
         default_related_name = 'reviews'
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
+        indexes = [
+            models.Index(fields=('title', 'pub_date'),
+                         name='review_title_pub_date_idx'),
+            # Serves the trending window scan of recent reviews.
+            models.Index(fields=('pub_date',), name='review_pub_date_idx'),
+        ]
         constraints = [
             models.UniqueConstraint(
                 name='unique_title_author',
@@ -51,6 +57,11 @@ class Review(TextPubDateModel):
             ),
         ]
 
+    def save(self, *args, **kwargs):
+        # Keeps the title rating update in the same transaction.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(TextPubDateModel):
     """Comment model class."""
@@ -65,3 +76,7 @@ class Comment(TextPubDateModel):
         default_related_name = 'comments'
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            models.Index(fields=('review', '-pub_date'),
+                         name='comment_review_pub_date_idx'),
+        ]
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from titles.models import Title
+
+from .models import Review
+
+
+def change_scores(title_id, scores):
+    Title.objects.filter(pk=title_id).change_scores(scores)
+
+
+@receiver(pre_save, sender=Review)
+def remember_previous_score(sender, instance, raw, **kwargs):
+    instance._previous = None
+    if raw or instance.pk is None:
+        return
+    instance._previous = Review.objects.select_for_update().filter(
+        pk=instance.pk).values_list('title_id', 'score').first()
+
+
+@receiver(post_save, sender=Review)
+def update_rating_on_save(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous', None)
+    if created or previous is None:
+        change_scores(instance.title_id, {instance.score: 1})
+        return
+    title_id, score = previous
+    if title_id != instance.title_id:
+        change_scores(title_id, {score: -1})
+        change_scores(instance.title_id, {instance.score: 1})
+    elif score != instance.score:
+        change_scores(title_id, {score: -1, instance.score: 1})
+
+
+@receiver(post_delete, sender=Review)
+def update_rating_on_delete(sender, instance, **kwargs):
+    change_scores(instance.title_id, {instance.score: -1})
@@ -0,0 +1,118 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import CharField, Count, F, FloatField, Value, Window
+from django.db.models.functions import Cast, RowNumber, TruncHour
+from django.utils import timezone
+from reviews.models import Review
+
+from .models import LeaderboardEntry, Title
+
+# Columns a title is grouped by in every scope of the top board.
+TOP_SCOPES = {
+    LeaderboardEntry.ALL: Value(''),
+    LeaderboardEntry.GENRE: F('genre__slug'),
+    LeaderboardEntry.CATEGORY: F('category__slug'),
+    LeaderboardEntry.YEAR: Cast('year', CharField()),
+}
+BOARD_SCOPES = {
+    LeaderboardEntry.TOP: tuple(TOP_SCOPES),
+    LeaderboardEntry.TRENDING: (LeaderboardEntry.ALL,),
+}
+
+
+def bayesian_rating(prior_mean):
+    """SQL twin of `ScoreHistogram.get_bayesian_rating`."""
+    weight = float(settings.RATING_PRIOR_WEIGHT)
+    return (
+        (Value(weight * prior_mean) + Cast('rating_sum', FloatField()))
+        / (Value(weight) + Cast('rating_count', FloatField()))
+    )
+
+
+def rank_top(scope, prior_mean, size):
+    """Top `size` reviewed titles of every group of the scope.
+
+    One query per scope: the positions come from ROW_NUMBER() over the
+    groups, ties are broken by the number of reviews.
+    """
+    rows = Title.objects.filter(rating_count__gt=0).annotate(
+        board_key=TOP_SCOPES[scope],
+        board_score=bayesian_rating(prior_mean),
+    ).filter(board_key__isnull=False).annotate(
+        board_position=Window(
+            RowNumber(),
+            partition_by=(
+                None if scope == LeaderboardEntry.ALL else [F('board_key')]),
+            order_by=[F('board_score').desc(), F('rating_count').desc(),
+                      F('pk').asc()],
+        )
+    ).filter(board_position__lte=size).order_by().values_list(
+        'board_key', 'board_position', 'pk', 'board_score')
+    return [
+        LeaderboardEntry(
+            board=LeaderboardEntry.TOP, scope=scope, key=key,
+            position=position, title_id=title_id, score=round(score, 2))
+        for key, position, title_id, score in rows
+    ]
+
+
+def get_trending_scores(now):
+    """Review counts of the trending window, decayed by their age.
+
+    A review weighs 1 when written and half as much every
+    TRENDING_HALF_LIFE_HOURS after. Reviews are counted per title and
+    hour in the database, so only the grouped rows are read.
+    """
+    since = now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    half_life = settings.TRENDING_HALF_LIFE_HOURS
+    rows = Review.objects.filter(pub_date__gte=since).annotate(
+        hour=TruncHour('pub_date')
+    ).order_by().values_list('title_id', 'hour').annotate(count=Count('pk'))
+    scores = Counter()
+    for title_id, hour, count in rows:
+        age = max((now - hour).total_seconds() / 3600, 0)
+        scores[title_id] += count * 0.5 ** (age / half_life)
+    return scores
+
+
+def rank_trending(now, size):
+    scores = get_trending_scores(now)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return [
+        LeaderboardEntry(
+            board=LeaderboardEntry.TRENDING, scope=LeaderboardEntry.ALL,
+            key='', position=position, title_id=title_id,
+            score=round(score, 3))
+        for position, (title_id, score) in enumerate(ranked[:size], 1)
+    ]
+
+
+def build_board(board, now):
+    size = settings.LEADERBOARD_SIZE
+    if board == LeaderboardEntry.TRENDING:
+        return rank_trending(now, size)
+    prior_mean = Title.objects.get_mean_score()
+    if prior_mean is None:
+        return []
+    entries = []
+    for scope in BOARD_SCOPES[board]:
+        entries.extend(rank_top(scope, prior_mean, size))
+    return entries
+
+
+def refresh_leaderboards(boards=tuple(BOARD_SCOPES), now=None):
+    """Rebuilds the boards, returns the number of entries per board.
+
+    Rankings are computed before the transaction, which only swaps the
+    rows, so readers see either the old or the new board.
+    """
+    now = now or timezone.now()
+    built = {board: build_board(board, now) for board in boards}
+    with transaction.atomic():
+        LeaderboardEntry.objects.filter(board__in=boards).delete()
+        for entries in built.values():
+            LeaderboardEntry.objects.bulk_create(entries, batch_size=1000)
+    return {board: len(entries) for board, entries in built.items()}
@@ -0,0 +1,83 @@
+# Generated by Django 2.2.16 on 2026-10-18 17:54
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+
+def fill_ratings(apps, schema_editor):
+    Title = apps.get_model('titles', 'Title')
+    titles = Title.objects.annotate(
+        actual_sum=Sum('reviews__score'),
+        actual_count=Count('reviews'),
+    ).filter(actual_count__gt=0)
+    for title in titles.iterator():
+        Title.objects.filter(pk=title.pk).update(
+            rating_sum=title.actual_sum, rating_count=title.actual_count)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0001_initial'),
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок'),
+        ),
+        migrations.AlterField(
+            model_name='category',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Наименование'),
+        ),
+        migrations.AlterField(
+            model_name='genre',
+            name='name',
+            field=models.CharField(max_length=256, verbose_name='Наименование'),
+        ),
+        migrations.AlterField(
+            model_name='genretitle',
+            name='genre',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='titles.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='genretitle',
+            name='title',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='titles.Title', verbose_name='Произведение'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='category',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='titles', to='titles.Category', verbose_name='Категория'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='description',
+            field=models.TextField(blank=True, null=True, verbose_name='Описание'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='genre',
+            field=models.ManyToManyField(through='titles.GenreTitle', to='titles.Genre', verbose_name='Жанр'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='name',
+            field=models.TextField(verbose_name='Произведение'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='year',
+            field=models.IntegerField(verbose_name='Год'),
+        ),
+        migrations.RunPython(fill_ratings, migrations.RunPython.noop),
+    ]
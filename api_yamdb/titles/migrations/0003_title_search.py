@@ -0,0 +1,76 @@
+from django.db import migrations
+
+SEARCH_VECTOR_SQL = """
+    setweight(to_tsvector('pg_catalog.russian', coalesce({0}name, '')), 'A')
+    || setweight(
+        to_tsvector('pg_catalog.russian', coalesce({0}description, '')), 'B')
+"""
+
+FORWARD_SQL = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'ALTER TABLE titles_title ADD COLUMN search_vector tsvector',
+    f"""
+    CREATE FUNCTION titles_title_search_vector_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := {SEARCH_VECTOR_SQL.format('NEW.')};
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER titles_title_search_vector_trigger
+    BEFORE INSERT OR UPDATE OF name, description ON titles_title
+    FOR EACH ROW EXECUTE PROCEDURE titles_title_search_vector_update()
+    """,
+    f'UPDATE titles_title SET search_vector = {SEARCH_VECTOR_SQL.format("")}',
+    """
+    CREATE INDEX titles_title_search_vector_gin
+    ON titles_title USING gin (search_vector)
+    """,
+    """
+    CREATE INDEX titles_title_name_trgm
+    ON titles_title USING gin (UPPER(name) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX titles_genre_name_trgm
+    ON titles_genre USING gin (UPPER(name) gin_trgm_ops)
+    """,
+    """
+    CREATE INDEX titles_category_name_trgm
+    ON titles_category USING gin (UPPER(name) gin_trgm_ops)
+    """,
+]
+
+BACKWARD_SQL = [
+    'DROP INDEX titles_category_name_trgm',
+    'DROP INDEX titles_genre_name_trgm',
+    'DROP INDEX titles_title_name_trgm',
+    'DROP TRIGGER titles_title_search_vector_trigger ON titles_title',
+    'DROP FUNCTION titles_title_search_vector_update()',
+    'ALTER TABLE titles_title DROP COLUMN search_vector',
+]
+
+
+def run_on_postgresql(statements):
+    # The search column, trigger and GIN indexes exist only on PostgreSQL,
+    # other backends fall back to LIKE scans.
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0002_title_rating'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run_on_postgresql(FORWARD_SQL),
+            run_on_postgresql(BACKWARD_SQL),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 18:07
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_genres(apps, schema_editor):
+    GenreTitle = apps.get_model('titles', 'GenreTitle')
+    keep = GenreTitle.objects.values('genre', 'title').annotate(
+        keep_id=Min('id')).values('keep_id')
+    GenreTitle.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0003_title_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_genres, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='genretitle',
+            index=models.Index(fields=['title', 'genre'], name='title_genre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['year'], name='title_year_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='genretitle',
+            constraint=models.UniqueConstraint(fields=('genre', 'title'), name='unique_genre_title'),
+        ),
+    ]
@@ -0,0 +1,127 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.db.models.deletion
+
+
+def fill_histograms(apps, schema_editor):
+    Review = apps.get_model('reviews', 'Review')
+    Title = apps.get_model('titles', 'Title')
+    for score in range(1, 11):
+        counts = Review.objects.filter(
+            title=OuterRef('pk'), score=score
+        ).order_by().values('title').annotate(count=Count('pk'))
+        Title.objects.update(**{f'score_{score}': Coalesce(
+            Subquery(counts.values('count')), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_updated_at'),
+        ('titles', '0005_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CategoryStats',
+            fields=[
+                ('rating_sum', models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок')),
+                ('rating_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок')),
+                ('score_1', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_2', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_3', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_4', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_5', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_6', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_7', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_8', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_9', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_10', models.PositiveIntegerField(default=0, editable=False)),
+                ('category', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='titles.category', verbose_name='Категория')),
+                ('titles_count', models.PositiveIntegerField(default=0, verbose_name='Произведений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+            options={
+                'verbose_name': 'Статистика категории',
+                'verbose_name_plural': 'Статистика категорий',
+            },
+        ),
+        migrations.CreateModel(
+            name='GenreStats',
+            fields=[
+                ('rating_sum', models.PositiveIntegerField(default=0, editable=False, verbose_name='Сумма оценок')),
+                ('rating_count', models.PositiveIntegerField(default=0, editable=False, verbose_name='Количество оценок')),
+                ('score_1', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_2', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_3', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_4', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_5', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_6', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_7', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_8', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_9', models.PositiveIntegerField(default=0, editable=False)),
+                ('score_10', models.PositiveIntegerField(default=0, editable=False)),
+                ('genre', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='titles.genre', verbose_name='Жанр')),
+                ('titles_count', models.PositiveIntegerField(default=0, verbose_name='Произведений')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Пересчитано')),
+            ],
+            options={
+                'verbose_name': 'Статистика жанра',
+                'verbose_name_plural': 'Статистика жанров',
+            },
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_1',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_10',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_2',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_3',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_4',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_5',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_6',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_7',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_8',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_9',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_histograms, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.16 on 2026-10-18 18:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0006_score_histogram'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('board', models.CharField(choices=[('top', 'Лучшие'), ('trending', 'Популярные за неделю')], max_length=16, verbose_name='Рейтинг')),
+                ('scope', models.CharField(choices=[('all', 'Все произведения'), ('genre', 'Жанр'), ('category', 'Категория'), ('year', 'Год')], max_length=16, verbose_name='Срез')),
+                ('key', models.CharField(blank=True, max_length=50, verbose_name='Значение среза')),
+                ('position', models.PositiveIntegerField(verbose_name='Место')),
+                ('score', models.FloatField(verbose_name='Балл')),
+                ('title', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='titles.title', verbose_name='Произведение')),
+            ],
+            options={
+                'verbose_name': 'Место в рейтинге',
+                'verbose_name_plural': 'Места в рейтингах',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='leaderboardentry',
+            constraint=models.UniqueConstraint(fields=('board', 'scope', 'key', 'position'), name='unique_leaderboard_position'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.16 on 2026-10-18 19:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('titles', '0007_leaderboard'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='category',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='genre',
+            name='updated_at',
+        ),
+        migrations.RemoveField(
+            model_name='title',
+            name='updated_at',
+        ),
+    ]
@@ -1,4 +1,14 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import Coalesce
+
+SCORES = range(1, 11)
+
+
+def score_field(score):
+    """Name of the histogram column counting reviews with `score`."""
+    return f'score_{score}'
 
 
 class Genre(models.Model):
@@ -29,7 +39,127 @@ class Category(models.Model):
         return self.name
 
 
-class Title(models.Model):
+class TitleQuerySet(models.QuerySet):
+    """Title queryset with denormalized rating maintenance."""
+
+    def change_scores(self, scores):
+        """Applies review counts per score to the rating and histogram.
+
+        `scores` maps a score to the number of added (or, if negative,
+        removed) reviews with it.
+        """
+        scores = {score: delta for score, delta in scores.items() if delta}
+        if not scores:
+            return 0
+        return self.update(
+            rating_sum=F('rating_sum') + sum(
+                score * delta for score, delta in scores.items()),
+            rating_count=F('rating_count') + sum(scores.values()),
+            **{score_field(score): F(score_field(score)) + delta
+               for score, delta in scores.items()}
+        )
+
+    def get_mean_score(self):
+        """Mean score of all reviews of the titles, None without any."""
+        totals = self.aggregate(
+            total=Sum('rating_sum'), count=Sum('rating_count'))
+        if not totals['count']:
+            return None
+        return totals['total'] / totals['count']
+
+    def refresh_ratings(self, batch_size=1000):
+        """Recomputes rating columns from reviews, returns fixed titles count.
+
+        Titles are locked batch by batch, so concurrent review writes
+        can not interleave with the reconciliation.
+        """
+        columns = ('rating_sum', 'rating_count',
+                   *(score_field(score) for score in SCORES))
+        actual_columns = {
+            'actual_sum': Coalesce(Sum('reviews__score'), 0),
+            'actual_count': Count('reviews'),
+            **{f'actual_{score}': Count(
+                'reviews', filter=Q(reviews__score=score))
+               for score in SCORES},
+        }
+        ids = list(self.order_by('pk').values_list('pk', flat=True))
+        fixed = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            with transaction.atomic():
+                list(Title.objects.select_for_update().filter(
+                    pk__in=batch).values_list('pk', flat=True))
+                actual = Title.objects.filter(pk__in=batch).annotate(
+                    **actual_columns
+                ).values_list('pk', *columns, *actual_columns)
+                for pk, *values in actual:
+                    current, new = values[:len(columns)], values[len(columns):]
+                    if current == new:
+                        continue
+                    Title.objects.filter(pk=pk).update(
+                        **dict(zip(columns, new)))
+                    fixed += 1
+        return fixed
+
+
+class ScoreHistogram(models.Model):
+    """Abstract rating with the number of reviews per score, 1 to 10."""
+
+    rating_sum = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Сумма оценок'
+    )
+    rating_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество оценок'
+    )
+    score_1 = models.PositiveIntegerField(default=0, editable=False)
+    score_2 = models.PositiveIntegerField(default=0, editable=False)
+    score_3 = models.PositiveIntegerField(default=0, editable=False)
+    score_4 = models.PositiveIntegerField(default=0, editable=False)
+    score_5 = models.PositiveIntegerField(default=0, editable=False)
+    score_6 = models.PositiveIntegerField(default=0, editable=False)
+    score_7 = models.PositiveIntegerField(default=0, editable=False)
+    score_8 = models.PositiveIntegerField(default=0, editable=False)
+    score_9 = models.PositiveIntegerField(default=0, editable=False)
+    score_10 = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating(self):
+        """Average review score rounded down, None without reviews."""
+        if not self.rating_count:
+            return None
+        return self.rating_sum // self.rating_count
+
+    @property
+    def histogram(self):
+        return {score: getattr(self, score_field(score)) for score in SCORES}
+
+    def get_bayesian_rating(self, prior_mean):
+        """Average pulled towards `prior_mean` while reviews are few."""
+        weight = settings.RATING_PRIOR_WEIGHT
+        if prior_mean is None:
+            return None
+        return round((weight * prior_mean + self.rating_sum)
+                     / (weight + self.rating_count), 2)
+
+    def get_stats(self, prior_mean):
+        return {
+            'count': self.rating_count,
+            'average': (round(self.rating_sum / self.rating_count, 2)
+                        if self.rating_count else None),
+            'rating': self.rating,
+            'bayesian_rating': self.get_bayesian_rating(prior_mean),
+            'histogram': self.histogram,
+        }
+
+
+class Title(ScoreHistogram):
     """Title model class."""
 
     name = models.TextField(verbose_name='Произведение')
@@ -52,9 +182,14 @@ class Title(models.Model):
         verbose_name='Категория'
     )
 
+    objects = TitleQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            models.Index(fields=('year',), name='title_year_idx'),
+        ]
 
     def __str__(self):
         return self.name
@@ -73,5 +208,165 @@ class GenreTitle(models.Model):
         on_delete=models.CASCADE,
         verbose_name='Произведение')
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_genre_title',
+                fields=('genre', 'title'),
+            ),
+        ]
+        indexes = [
+            # Serves genre prefetching for title pages.
+            models.Index(fields=('title', 'genre'), name='title_genre_idx'),
+        ]
+
     def __str__(self):
         return f'{self.genre} {self.title}'
+
+
+class RollupQuerySet(models.QuerySet):
+    """Rating rollups of title groups, recomputed in batch."""
+
+    def refresh(self):
+        """Rebuilds every rollup from the title histograms.
+
+        One grouped query over titles, so reviews are never scanned.
+        Returns the number of rollups.
+        """
+        lookup = self.model.rollup_lookup
+        columns = ('rating_sum', 'rating_count',
+                   *(score_field(score) for score in SCORES))
+        rows = Title.objects.filter(
+            **{f'{lookup}__isnull': False}
+        ).order_by().values(lookup).annotate(
+            total_titles=Count('pk'),
+            **{f'total_{column}': Sum(column) for column in columns}
+        )
+        rollups = [
+            self.model(
+                titles_count=row['total_titles'],
+                **{f'{lookup}_id': row[lookup]},
+                **{column: row[f'total_{column}'] for column in columns}
+            )
+            for row in rows
+        ]
+        with transaction.atomic():
+            self.model.objects.all().delete()
+            self.model.objects.bulk_create(rollups, batch_size=1000)
+        return len(rollups)
+
+
+class GenreStats(ScoreHistogram):
+    """Rating rollup of the titles of a genre."""
+
+    genre = models.OneToOneField(
+        Genre,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Жанр'
+    )
+    titles_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Произведений'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Пересчитано'
+    )
+
+    rollup_lookup = 'genre'
+    objects = RollupQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика жанра'
+        verbose_name_plural = 'Статистика жанров'
+
+
+class CategoryStats(ScoreHistogram):
+    """Rating rollup of the titles of a category."""
+
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Категория'
+    )
+    titles_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Произведений'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Пересчитано'
+    )
+
+    rollup_lookup = 'category'
+    objects = RollupQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+
+class LeaderboardEntry(models.Model):
+    """Precomputed position of a title in a leaderboard.
+
+    Boards are rebuilt by `refresh_leaderboards`, reads take a range of
+    the unique index on (board, scope, key, position).
+    """
+
+    TOP = 'top'
+    TRENDING = 'trending'
+    BOARDS = (
+        (TOP, 'Лучшие'),
+        (TRENDING, 'Популярные за неделю'),
+    )
+    ALL = 'all'
+    GENRE = 'genre'
+    CATEGORY = 'category'
+    YEAR = 'year'
+    SCOPES = (
+        (ALL, 'Все произведения'),
+        (GENRE, 'Жанр'),
+        (CATEGORY, 'Категория'),
+        (YEAR, 'Год'),
+    )
+
+    board = models.CharField(
+        max_length=16,
+        choices=BOARDS,
+        verbose_name='Рейтинг'
+    )
+    scope = models.CharField(
+        max_length=16,
+        choices=SCOPES,
+        verbose_name='Срез'
+    )
+    key = models.CharField(
+        max_length=50,
+        blank=True,
+        verbose_name='Значение среза'
+    )
+    position = models.PositiveIntegerField(verbose_name='Место')
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Произведение'
+    )
+    score = models.FloatField(verbose_name='Балл')
+
+    class Meta:
+        verbose_name = 'Место в рейтинге'
+        verbose_name_plural = 'Места в рейтингах'
+        constraints = [
+            models.UniqueConstraint(
+                name='unique_leaderboard_position',
+                fields=('board', 'scope', 'key', 'position'),
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.board} {self.scope} {self.key} #{self.position}'
@@ -1,5 +1,11 @@
+import secrets
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
 
 
 class User(AbstractUser):
@@ -36,6 +42,11 @@ class User(AbstractUser):
         'Биография',
         blank=True,
     )
+    token_version = models.PositiveIntegerField(
+        'Версия токенов',
+        default=0,
+        editable=False,
+    )
 
     @property
     def is_admin(self):
@@ -47,3 +58,59 @@ class User(AbstractUser):
     def is_moderator(self):
         return (self.is_admin
                 or self.role == self.MODERATOR)
+
+
+def hash_code(user_id, code):
+    """HMAC of the code, bound to the user and the SECRET_KEY."""
+    return salted_hmac(
+        'users.ConfirmationCode', f'{user_id}:{code}', algorithm='sha256'
+    ).hexdigest()
+
+
+class ConfirmationCodeQuerySet(models.QuerySet):
+    """Confirmation codes, one per user."""
+
+    def issue(self, user):
+        """Replaces the code of the user, returns the new plain code.
+
+        Only the hash is stored, the code itself goes into the email.
+        """
+        length = settings.CONFIRMATION_CODE_LENGTH
+        code = str(secrets.randbelow(10 ** length)).zfill(length)
+        self.update_or_create(user=user, defaults={
+            'code_hash': hash_code(user.pk, code),
+            'expires_at': timezone.now() + timedelta(
+                minutes=settings.CONFIRMATION_CODE_MINUTES),
+        })
+        return code
+
+
+class ConfirmationCode(models.Model):
+    """Hashed short-lived code exchanged for a token."""
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='confirmation_code',
+        verbose_name='Пользователь'
+    )
+    code_hash = models.CharField('Хеш кода', max_length=64)
+    expires_at = models.DateTimeField('Действует до')
+
+    objects = ConfirmationCodeQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Код подтверждения'
+        verbose_name_plural = 'Коды подтверждения'
+
+    def __str__(self):
+        return f'{self.user_id} {self.expires_at}'
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def check_code(self, code):
+        return constant_time_compare(
+            self.code_hash, hash_code(self.user_id, code))
@@ -0,0 +1,90 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
+
+
+@pytest.fixture
+def user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUser', email='testuser@yamdb.fake')
+
+
+@pytest.fixture
+def another_user(django_user_model):
+    return django_user_model.objects.create(
+        username='TestUserAnother', email='testuseranother@yamdb.fake')
+
+
+@pytest.fixture
+def admin(django_user_model):
+    return django_user_model.objects.create(
+        username='TestAdmin', email='testadmin@yamdb.fake', role='admin')
+
+
+@pytest.fixture
+def category():
+    from titles.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genre():
+    from titles.models import Genre
+    return Genre.objects.create(name='Драма', slug='drama')
+
+
+@pytest.fixture
+def title(category, genre):
+    from titles.models import Title
+    title = Title.objects.create(name='Побег из Шоушенка', year=1994,
+                                 category=category)
+    title.genre.add(genre)
+    return title
+
+
+@pytest.fixture
+def catalogue(category, genre, django_user_model):
+    """Fills the catalogue with enough rows for several pages."""
+    from reviews.models import Comment, Review
+    from titles.models import Genre, GenreTitle, Title
+
+    size = 30
+    other_genre = Genre.objects.create(name='Комедия', slug='comedy')
+    django_user_model.objects.bulk_create(
+        django_user_model(username=f'author{i}',
+                          email=f'author{i}@yamdb.fake')
+        for i in range(size)
+    )
+    authors = django_user_model.objects.filter(username__startswith='author')
+    Title.objects.bulk_create(
+        Title(name=f'Произведение {i}', year=2000, category=category)
+        for i in range(size)
+    )
+    titles = list(Title.objects.order_by('pk'))
+    GenreTitle.objects.bulk_create(
+        GenreTitle(genre=item, title=title)
+        for title in titles for item in (genre, other_genre)
+    )
+    Review.objects.bulk_create(
+        Review(title=titles[0], author=author, text='text', score=5)
+        for author in authors
+    )
+    review = Review.objects.order_by('pk').first()
+    Comment.objects.bulk_create(
+        Comment(review=review, author=author, text='text')
+        for author in authors
+    )
+    Title.objects.refresh_ratings()
+    return {'title': titles[0], 'review': review}
+
+
+@pytest.fixture
+def admin_client(admin):
+    from rest_framework.test import APIClient
+    client = APIClient()
+    client.force_authenticate(user=admin)
+    return client
@@ -0,0 +1,112 @@
+import asyncio
+import importlib
+import os
+import subprocess
+import sys
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import clear_url_caches, resolve
+from rest_framework_simplejwt.tokens import RefreshToken
+
+URL_MODULES = ('api.v1.urls', 'api.urls', 'api_yamdb.urls')
+READ_PATHS = (
+    '/api/v1/titles/', '/api/v1/titles/1/',
+    '/api/v1/titles/1/reviews/', '/api/v1/titles/1/reviews/1/comments/',
+)
+
+
+def reload_urls():
+    for name in URL_MODULES:
+        importlib.reload(importlib.import_module(name))
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views(settings):
+    settings.ASYNC_VIEWS = True
+    reload_urls()
+    yield
+    settings.ASYNC_VIEWS = False
+    reload_urls()
+
+
+async def send(method, path, **kwargs):
+    return await getattr(AsyncClient(), method)(path, **kwargs)
+
+
+def request(method, path, **kwargs):
+    return async_to_sync(send)(method, path, **kwargs)
+
+
+class TestAsyncViews:
+
+    @pytest.mark.parametrize('path', READ_PATHS)
+    def test_read_views_are_coroutines(self, async_views, path):
+        assert asyncio.iscoroutinefunction(resolve(path).func), (
+            f'Проверьте, что {path} обслуживается асинхронным представлением'
+        )
+
+    @pytest.mark.parametrize('path', READ_PATHS)
+    def test_sync_views_by_default(self, path):
+        assert not asyncio.iscoroutinefunction(resolve(path).func), (
+            'Проверьте, что под WSGI представления остаются синхронными'
+        )
+
+    def test_asgi_enables_async_views(self):
+        from django.conf import settings
+
+        env = {name: value for name, value in os.environ.items()
+               if name != 'ASYNC_VIEWS'}
+        code = ('import asyncio, api_yamdb.asgi; '
+                'from django.urls import resolve; '
+                'print(asyncio.iscoroutinefunction('
+                'resolve("/api/v1/titles/").func))')
+        result = subprocess.run(
+            [sys.executable, '-c', code], cwd=settings.BASE_DIR, env=env,
+            capture_output=True, text=True)
+        assert result.stdout.strip() == 'True', (
+            'Проверьте, что asgi.py включает асинхронные представления: '
+            f'{result.stderr[-300:]}'
+        )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures('async_views')
+class TestAsgiRequests:
+
+    def test_cached_title(self, title):
+        url = f'/api/v1/titles/{title.id}/'
+        assert request('get', url)['X-Cache'] == 'MISS'
+        response = request('get', url)
+        assert response.status_code == 200
+        assert response['X-Cache'] == 'HIT'
+        assert response.json()['name'] == title.name
+
+    def test_reviews_and_comments(self, catalogue):
+        title, review = catalogue['title'], catalogue['review']
+        response = request('get', f'/api/v1/titles/{title.id}/reviews/')
+        assert response.status_code == 200
+        assert response.json()['count'] == 30
+        response = request(
+            'get',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        )
+        assert response.status_code == 200
+        assert response.json()['count'] == 30
+
+    def test_not_found(self, title):
+        response = request('get', f'/api/v1/titles/{title.id + 1}/reviews/')
+        assert response.status_code == 404
+
+    def test_write_goes_through_sync_view(self, title, user):
+        token = RefreshToken.for_user(user).access_token
+        response = request(
+            'post', f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 8},
+            content_type='application/json',
+            headers={'Authorization': f'Bearer {token}'},
+        )
+        assert response.status_code == 201
+        assert title.reviews.count() == 1
@@ -0,0 +1,217 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+def bearer_client(user):
+    client = APIClient()
+    token = RefreshToken.for_user(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+@pytest.mark.django_db(transaction=True)
+class TestCachedAuthentication:
+
+    def test_user_lookup_is_cached(self, user):
+        client = bearer_client(user)
+        assert client.get('/api/v1/users/me/').status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/users/me/')
+        assert response.status_code == 200
+        assert len(queries) == 0, (
+            'Проверьте, что пользователь токена берётся из кэша'
+        )
+
+    def test_role_change_applies_immediately(self, user):
+        client = bearer_client(user)
+        assert client.get('/api/v1/users/').status_code == 403
+        user.role = user.ADMIN
+        user.save()
+        assert client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сбрасывает кэш пользователя'
+        )
+
+    def test_deactivated_user_rejected(self, user):
+        client = bearer_client(user)
+        client.get('/api/v1/users/me/')
+        user.is_active = False
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == 401
+
+    def test_second_review_rejected(self, title, user):
+        client = bearer_client(user)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        assert client.post(url, data=data).status_code == 201
+        response = client.post(url, data=data)
+        assert response.status_code == 400
+        assert title.reviews.count() == 1
+
+
+def obtain_tokens(user):
+    from users.models import ConfirmationCode
+
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': ConfirmationCode.objects.issue(user),
+    })
+    assert response.status_code == 200
+    return response.json()
+
+
+def claims_client(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+def user_queries(queries):
+    return [query for query in queries if 'users_user' in query['sql']]
+
+
+@pytest.mark.django_db(transaction=True)
+class TestTokenClaims:
+
+    @pytest.fixture(autouse=True)
+    def claims_mode(self, settings):
+        settings.TOKEN_CLAIMS_AUTH = True
+
+    def test_permissions_without_user_query(self, user, admin):
+        client = claims_client(obtain_tokens(user)['access'])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/api/v1/users/')
+        assert response.status_code == 403
+        assert len(queries) == 0, (
+            'Проверьте, что права проверяются по токену без запросов к базе'
+        )
+        client = claims_client(obtain_tokens(admin)['access'])
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(
+                '/api/v1/genres/', data={'name': 'Жанр', 'slug': 'new'})
+        assert response.status_code == 201
+        assert user_queries(queries) == []
+
+    def test_author_from_claims(self, title, user):
+        client = claims_client(obtain_tokens(user)['access'])
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        with CaptureQueriesContext(connection) as queries:
+            response = client.post(url, data={'text': 'Отзыв', 'score': 5})
+        assert response.status_code == 201
+        assert response.json()['author'] == user.username
+        assert user_queries(queries) == [], (
+            'Проверьте, что автор отзыва берётся из токена'
+        )
+        response = client.patch(
+            f'{url}{response.json()["id"]}/', data={'text': 'Другой'})
+        assert response.status_code == 200
+
+    def test_role_downgrade_revokes_token(self, admin):
+        tokens = obtain_tokens(admin)
+        client = claims_client(tokens['access'])
+        assert client.get('/api/v1/users/').status_code == 200
+        admin.role = admin.USER
+        admin.is_superuser = admin.is_staff = False
+        admin.save()
+        response = client.get('/api/v1/users/')
+        assert response.status_code == 401, (
+            'Проверьте, что после понижения роли старый токен отклоняется'
+        )
+        response = APIClient().post(
+            '/api/v1/auth/token/refresh/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 200
+        client = claims_client(response.json()['access'])
+        assert client.get('/api/v1/users/').status_code == 403, (
+            'Проверьте, что обновлённый токен содержит новую роль'
+        )
+
+    def test_revocation_survives_cache_loss(self, user):
+        from django.core.cache import cache
+
+        client = claims_client(obtain_tokens(user)['access'])
+        cache.clear()
+        assert client.get('/api/v1/users/me/').status_code == 200, (
+            'Проверьте, что без изменений пользователя токен действует'
+        )
+        user.role = user.MODERATOR
+        user.save()
+        cache.clear()
+        assert client.get('/api/v1/users/me/').status_code == 401, (
+            'Проверьте, что отзыв токена хранится в базе, а не только в кэше'
+        )
+
+    def test_refresh_rejected_for_inactive_user(self, user):
+        tokens = obtain_tokens(user)
+        user.is_active = False
+        user.save()
+        response = APIClient().post(
+            '/api/v1/auth/token/refresh/', data={'refresh': tokens['refresh']})
+        assert response.status_code == 401
+        assert claims_client(tokens['access']).get(
+            '/api/v1/users/me/').status_code == 401
+
+
+def request_token(username, code):
+    return APIClient().post('/api/v1/auth/token/', data={
+        'username': username, 'confirmation_code': code})
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConfirmationCode:
+
+    def test_code_stored_hashed(self, user):
+        from users.models import ConfirmationCode
+
+        code = ConfirmationCode.objects.issue(user)
+        assert len(code) == 6 and code.isdigit()
+        assert code not in ConfirmationCode.objects.get().code_hash, (
+            'Проверьте, что код подтверждения хранится в виде хеша'
+        )
+        assert request_token(user.username, code).status_code == 200
+        assert request_token(user.username, code).status_code == 400, (
+            'Проверьте, что код подтверждения одноразовый'
+        )
+
+    def test_attempts_cut_off(self, user, settings):
+        from users.models import ConfirmationCode
+
+        settings.CONFIRMATION_MAX_ATTEMPTS = 3
+        code = ConfirmationCode.objects.issue(user)
+        wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+        with CaptureQueriesContext(connection) as queries:
+            assert request_token(user.username, wrong).status_code == 400
+        assert len(queries) == 1, (
+            'Проверьте, что неверный код проверяется одним запросом'
+        )
+        for _ in range(2):
+            request_token(user.username, wrong)
+        with CaptureQueriesContext(connection) as queries:
+            response = request_token(user.username, code)
+        assert response.status_code == 403, (
+            'Проверьте, что после нескольких ошибок код перестаёт работать'
+        )
+        assert len(queries) == 0
+        assert not ConfirmationCode.objects.exists()
+
+    def test_expired_code(self, user, settings):
+        from users.models import ConfirmationCode
+
+        settings.CONFIRMATION_CODE_MINUTES = 0
+        code = ConfirmationCode.objects.issue(user)
+        assert request_token(user.username, code).status_code == 400
+
+    def test_unknown_username_cached(self, client):
+        assert request_token('ghost', '000000').status_code == 404
+        with CaptureQueriesContext(connection) as queries:
+            assert request_token('ghost', '000000').status_code == 404
+        assert len(queries) == 0, (
+            'Проверьте, что неизвестные имена отклоняются из кэша'
+        )
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'ghost', 'email': 'ghost@yamdb.fake'})
+        assert request_token('ghost', '000000').status_code == 400, (
+            'Проверьте, что после регистрации имя перестаёт считаться '
+            'неизвестным'
+        )
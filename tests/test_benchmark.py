@@ -0,0 +1,57 @@
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.fixture
+def synthetic(db):
+    call_command('seed_synthetic', titles=5, users=4, reviews_per_title=3,
+                 comments_per_review=2, genres=3, categories=2)
+
+
+@pytest.mark.django_db
+class TestBenchmark:
+
+    def test_seed_scale(self, synthetic):
+        from reviews.models import Comment, Review
+        from titles.models import Title
+
+        assert Title.objects.count() == 5
+        assert Review.objects.count() == 15
+        assert Comment.objects.count() == 30
+        assert Title.objects.refresh_ratings() == 0, (
+            'Проверьте, что рейтинги сгенерированных произведений верны'
+        )
+
+    def test_save_and_compare(self, synthetic, tmp_path, settings):
+        from reviews.models import Review
+        from titles.models import Title
+
+        # Scenarios must not be cut short by the write rate limits.
+        settings.THROTTLE_RATES = {'admin': '1/m'}
+        path = tmp_path / 'baseline.json'
+        call_command('benchmark', requests=3, warmup=0, save=str(path))
+        baseline = json.loads(path.read_text())
+        assert {'titles-list', 'title-retrieve', 'titles-search',
+                'review-create', 'comments-list'} <= set(baseline['results'])
+        assert set(baseline['results']['titles-list']) == {
+            'requests', 'rps', 'p50_ms', 'p95_ms', 'p99_ms'}
+        assert Title.objects.count() == 5 and Review.objects.count() == 15, (
+            'Проверьте, что запись в сценариях откатывается'
+        )
+
+        for result in baseline['results'].values():
+            result['p50_ms'] = result['p95_ms'] = 0.001
+        path.write_text(json.dumps(baseline))
+        with pytest.raises(CommandError, match='regression'):
+            call_command('benchmark', requests=3, warmup=0,
+                         scenario=['genres-list'], compare=str(path))
+
+    def test_serializers(self, synthetic, tmp_path):
+        path = tmp_path / 'serializers.json'
+        call_command('benchmark_serializers', page_size=[10], repeat=1,
+                     save=str(path))
+        results = json.loads(path.read_text())['results']
+        assert set(results) == {'titles-10', 'reviews-10', 'comments-10'}
+        assert results['titles-10']['rows'] == 5
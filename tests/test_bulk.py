@@ -0,0 +1,112 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+    url = '/api/v1/titles/bulk/'
+
+    def test_create(self, admin_client, genre, category):
+        from titles.models import Title
+
+        data = [
+            {'name': f'Произведение {i}', 'year': 2000,
+             'genre': ['drama'], 'category': 'movie'}
+            for i in range(50)
+        ]
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 201, response.data
+        assert len(response.data) == 50
+        assert response.data[0]['genre'] == ['drama']
+        assert response.data[0]['category'] == 'movie'
+        assert Title.objects.filter(genre=genre).count() == 50
+
+    def test_errors_are_per_item_and_nothing_is_written(
+            self, admin_client, genre, category):
+        from titles.models import Title
+
+        data = [
+            {'name': 'Хорошее', 'year': 2000,
+             'genre': ['drama'], 'category': 'movie'},
+            {'name': 'Плохое', 'year': 2000,
+             'genre': ['unknown'], 'category': 'movie'},
+            {'name': 'Без года', 'genre': ['drama'], 'category': 'nope'},
+        ]
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert 'genre' in response.data[1]
+        assert set(response.data[2]) == {'year'}
+        assert not Title.objects.exists()
+
+    def test_update(self, admin_client, title):
+        from titles.models import Genre
+
+        Genre.objects.create(name='Комедия', slug='comedy')
+        data = [{'id': title.id, 'year': 1995, 'genre': ['comedy']}]
+        response = admin_client.patch(self.url, data, format='json')
+        assert response.status_code == 200, response.data
+        title.refresh_from_db()
+        assert title.year == 1995
+        assert list(title.genre.values_list('slug', flat=True)) == ['comedy']
+
+    def test_admin_only(self, client, genre, category):
+        response = client.post(self.url, [], content_type='application/json')
+        assert response.status_code == 401
+
+
+@pytest.mark.django_db
+class TestBulkReviews:
+    url = '/api/v1/reviews/bulk/'
+
+    def test_create_updates_rating(self, admin_client, title, user,
+                                   another_user):
+        data = [
+            {'title': title.id, 'author': user.username,
+             'text': 'text', 'score': 10},
+            {'title': title.id, 'author': another_user.username,
+             'text': 'text', 'score': 6},
+        ]
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 201, response.data
+        assert [item['author'] for item in response.data] == [
+            user.username, another_user.username]
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (16, 2)
+        assert (title.score_10, title.score_6) == (1, 1)
+
+    def test_existing_review_rejected(self, admin_client, title, user):
+        from api.v1.serializers import ReviewBulkSerializer
+        from reviews.models import Review
+
+        assert ReviewBulkSerializer().validators == [], (
+            'Проверьте, что пары произведение-автор проверяет только '
+            'сериализатор списка'
+        )
+        Review.objects.create(title=title, author=user, text='t', score=5)
+        data = [{'title': title.id, 'author': user.username,
+                 'text': 'text', 'score': 7}]
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 400
+        assert 'non_field_errors' in response.data[0]
+
+    def test_duplicates_rejected(self, admin_client, title, user):
+        data = [{'title': title.id, 'author': user.username,
+                 'text': 'text', 'score': 5}] * 2
+        response = admin_client.post(self.url, data, format='json')
+        assert response.status_code == 400
+        assert response.data[0] == {}
+        assert 'non_field_errors' in response.data[1]
+
+
+@pytest.mark.django_db
+class TestBulkGenreTitles:
+
+    def test_assign(self, admin_client, title, genre):
+        from titles.models import Genre
+
+        Genre.objects.create(name='Комедия', slug='comedy')
+        data = [{'title': title.id, 'genre': ['drama', 'comedy']}]
+        response = admin_client.post(
+            '/api/v1/titles/bulk-genres/', data, format='json')
+        assert response.status_code == 201, response.data
+        assert title.genre.count() == 2
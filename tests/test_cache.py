@@ -0,0 +1,53 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db(transaction=True)
+class TestResponseCache:
+
+    def test_title_detail_cached_until_review(self, title, user):
+        from api.cache import get_stats
+        from reviews.models import Review
+
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/'
+        assert client.get(url)['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT'
+        assert response.data['rating'] is None
+        assert get_stats()['title']['hit'] >= 1
+
+        Review.objects.create(title=title, author=user, text='text', score=9)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что новый отзыв сбрасывает кэш произведения'
+        )
+        assert response.data['rating'] == 9
+
+    def test_query_params_are_part_of_key(self, title):
+        client = APIClient()
+        assert client.get('/api/v1/titles/?limit=1')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/titles/?limit=2')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/titles/?limit=1')['X-Cache'] == 'HIT'
+
+    def test_genre_rename_busts_titles(self, title, genre):
+        client = APIClient()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/genres/')
+        genre.name = 'Трагедия'
+        genre.save()
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.data['results'][0]['genre'][0]['name'] == 'Трагедия'
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+
+    def test_genre_assignment_busts_title(self, title, category):
+        from titles.models import Genre
+
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        title.genre.add(Genre.objects.create(name='Комедия', slug='comedy'))
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.data['genre']) == 2
@@ -0,0 +1,118 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def get(url, **headers):
+    return APIClient().get(url, **headers)
+
+
+@pytest.mark.django_db(transaction=True)
+class TestConditionalGet:
+
+    def test_list_not_modified(self, catalogue):
+        url = '/api/v1/titles/?limit=5'
+        response = get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag'), (
+            'Проверьте, что ответ содержит заголовок ETag'
+        )
+        assert response.has_header('Last-Modified')
+        with CaptureQueriesContext(connection) as queries:
+            cached = get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == 304, (
+            'Проверьте, что для неизменившегося списка возвращается 304'
+        )
+        assert not cached.content
+        assert len(queries) == 0, (
+            'Проверьте, что ответ 304 отдаётся без запросов к базе'
+        )
+
+    def test_if_modified_since(self, catalogue):
+        url = f'/api/v1/titles/{catalogue["title"].id}/'
+        response = get(url)
+        since = get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert since.status_code == 304
+
+    def test_pages_have_own_etags(self, catalogue):
+        assert (get('/api/v1/titles/?limit=1')['ETag']
+                != get('/api/v1/titles/?limit=2')['ETag'])
+
+    def test_filtered_list(self, catalogue):
+        url = '/api/v1/titles/?search=Побег&genre=drama'
+        etag = get(url)['ETag']
+        assert get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    @pytest.mark.parametrize('change', ('review', 'genre', 'delete'))
+    def test_changes_update_etag(self, catalogue, admin, change):
+        from reviews.models import Review
+        title = catalogue['title']
+        url = '/api/v1/titles/'
+        etag = get(url)['ETag']
+        if change == 'review':
+            Review.objects.create(
+                title=catalogue['title'], author=admin, text='Отзыв', score=1)
+        elif change == 'genre':
+            genre = title.genre.first()
+            genre.name = 'Трагедия'
+            genre.save()
+        else:
+            title.delete()
+        response = get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменения данных меняют ETag списка'
+        )
+        assert response['ETag'] != etag
+
+    def test_title_genres_update_etag(self, catalogue):
+        from titles.models import Genre
+
+        title = catalogue['title']
+        url = f'/api/v1/titles/{title.id}/'
+        etag = get(url)['ETag']
+        title.genre.add(Genre.objects.create(name='Трагедия', slug='tragedy'))
+        assert get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200
+
+    def test_nested_lists(self, catalogue):
+        title, review = catalogue['title'], catalogue['review']
+        for url in (f'/api/v1/titles/{title.id}/reviews/',
+                    f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+                    'comments/'):
+            etag = get(url)['ETag']
+            assert get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+
+    def test_missing_object(self, catalogue):
+        response = get('/api/v1/titles/0/', HTTP_IF_NONE_MATCH='*')
+        assert response.status_code == 404
+
+    def test_cache_hit_without_queries(self, catalogue):
+        url = '/api/v1/titles/?count=none'
+        get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = get(url)
+        assert response['X-Cache'] == 'HIT'
+        assert len(queries) == 0, (
+            'Проверьте, что ETag ответа из кэша вычисляется без запросов'
+        )
+
+    def test_username_updates_review_etag(self, catalogue):
+        review = catalogue['review']
+        url = f'/api/v1/titles/{review.title_id}/reviews/'
+        etag = get(url)['ETag']
+        review.author.username = 'renamed'
+        review.author.save()
+        response = get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что смена имени автора меняет ETag отзывов'
+        )
+
+    def test_lost_generations_change_etag(self, catalogue):
+        from django.core.cache import cache
+
+        url = '/api/v1/titles/'
+        etag = get(url)['ETag']
+        cache.clear()
+        assert get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, (
+            'Проверьте, что после очистки кэша старый ETag не подходит'
+        )
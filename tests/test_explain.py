@@ -0,0 +1,26 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+
+@pytest.mark.django_db
+class TestExplainQueries:
+
+    def test_checks_every_endpoint(self, catalogue, capsys):
+        call_command('explain_queries')
+        output = capsys.readouterr().out
+        title, review = catalogue['title'], catalogue['review']
+        for path in (
+            '/api/v1/genres/',
+            f'/api/v1/titles/{title.id}/',
+            f'/api/v1/titles/?year={title.year}',
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        ):
+            assert f'OK   {path}' in output, (
+                f'Проверьте, что запрос {path} проверяется через EXPLAIN'
+            )
+
+    def test_flags_small_threshold(self, catalogue, capsys):
+        with pytest.raises(CommandError):
+            call_command('explain_queries', min_rows=0, fail=True)
+        assert 'SEQ  /api/v1/genres/' in capsys.readouterr().out
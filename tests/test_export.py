@@ -0,0 +1,53 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_csv_endpoint(self, admin_client, title):
+        response = admin_client.get('/api/v1/export/titles.csv')
+        assert response.status_code == 200
+        assert response.streaming
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        assert lines == [
+            'id,name,year,description,category',
+            f'{title.id},{title.name},1994,,{title.category_id}',
+        ]
+
+    def test_ndjson_endpoint(self, admin_client, title):
+        response = admin_client.get('/api/v1/export/genre_title.ndjson')
+        assert response.status_code == 200
+        rows = [json.loads(line) for line in
+                b''.join(response.streaming_content).splitlines()]
+        assert rows == [{
+            'id': title.genretitle_set.get().id,
+            'title_id': title.id,
+            'genre_id': title.genre.get().id,
+        }]
+
+    def test_unknown_dataset(self, admin_client):
+        assert admin_client.get('/api/v1/export/x.csv').status_code == 404
+        assert admin_client.get('/api/v1/export/titles.xml').status_code == 404
+
+    def test_admin_only(self, client, title):
+        assert client.get('/api/v1/export/titles.csv').status_code == 401
+
+    def test_round_trip(self, title, user, tmp_path):
+        from reviews.models import Review
+        from titles.models import Category, Genre, GenreTitle, Title
+
+        Review.objects.create(title=title, author=user, text='text', score=7)
+        call_command('export_data', path=str(tmp_path), verbosity=0)
+        assert (tmp_path / 'review.csv').exists()
+        for model in (Review, GenreTitle, Title, Genre, Category):
+            model.objects.all().delete()
+
+        call_command('load_example_data', path=str(tmp_path), upsert=True,
+                     stdout=open('/dev/null', 'w'))
+        title = Title.objects.get()
+        assert title.name == 'Побег из Шоушенка'
+        assert title.rating == 7
+        assert title.genre.get().slug == 'drama'
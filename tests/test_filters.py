@@ -0,0 +1,23 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestTitleFilter:
+
+    def test_search_name_and_description(self, title):
+        from titles.models import Title
+
+        Title.objects.create(name='Крестный отец', year=1972,
+                             description='Побег невозможен')
+        response = APIClient().get('/api/v1/titles/?search=Побег')
+        assert response.data['count'] == 2
+        response = APIClient().get('/api/v1/titles/?search=отец')
+        assert response.data['count'] == 1
+
+    def test_slug_filters_are_exact(self, title):
+        client = APIClient()
+        assert client.get('/api/v1/titles/?genre=drama').data['count'] == 1
+        assert client.get('/api/v1/titles/?genre=dram').data['count'] == 0
+        assert client.get('/api/v1/titles/?category=movie').data['count'] == 1
+        assert client.get('/api/v1/titles/?category=mov').data['count'] == 0
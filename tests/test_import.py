@@ -0,0 +1,104 @@
+import csv
+import io
+import os
+
+import pytest
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+
+
+def load(**options):
+    out = io.StringIO()
+    call_command('load_example_data', stdout=out, **options)
+    return out.getvalue()
+
+
+def count_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding='utf-8',
+              newline='') as csvfile:
+        return sum(1 for _ in csv.reader(csvfile)) - 1
+
+
+def write_csv(path, filename, rows):
+    with open(path / filename, 'w', encoding='utf-8', newline='') as csvfile:
+        csv.writer(csvfile).writerows(rows)
+
+
+@pytest.fixture(params=['orm', 'copy'])
+def no_copy(request):
+    if request.param == 'copy' and connection.vendor != 'postgresql':
+        pytest.skip('COPY is used on PostgreSQL only')
+    return request.param == 'orm'
+
+
+@pytest.mark.django_db(transaction=True)
+class TestImport:
+
+    def test_static_data_in_batches(self, no_copy):
+        from core.datasets import DATASETS
+        from reviews.models import Review
+        from titles.models import Title
+
+        output = load(batch_size=7, no_copy=no_copy)
+        for dataset in DATASETS:
+            assert dataset.model.objects.count() == count_rows(
+                dataset.filename), (
+                f'Проверьте, что загружены все строки {dataset.filename}'
+            )
+            assert f'done: {count_rows(dataset.filename)} rows' in output
+        review = Review.objects.get(pk=1)
+        assert review.pub_date.year == 2019, (
+            'Проверьте, что дата публикации берётся из файла'
+        )
+        title = Title.objects.get(pk=review.title_id)
+        scores = list(title.reviews.values_list('score', flat=True))
+        assert title.rating == round(sum(scores) / len(scores)), (
+            'Проверьте, что рейтинги пересчитываются после загрузки'
+        )
+
+    def test_sequences_reset(self, no_copy):
+        from titles.models import Genre
+
+        load(no_copy=no_copy)
+        genre = Genre.objects.create(name='Новый', slug='new-genre')
+        assert genre.pk > count_rows('genre.csv'), (
+            'Проверьте, что последовательности id сдвигаются после загрузки'
+        )
+
+    def test_upsert(self, no_copy, tmp_path):
+        from titles.models import Category, Title
+
+        write_csv(tmp_path, 'category.csv', [
+            ('id', 'name', 'slug'), (1, 'Фильмы', 'movie')])
+        write_csv(tmp_path, 'titles.csv', [
+            ('id', 'name', 'year', 'category'), (1, 'Старое', 1994, 1)])
+        load(path=str(tmp_path), no_copy=no_copy)
+
+        write_csv(tmp_path, 'titles.csv', [
+            ('id', 'name', 'year', 'category'),
+            (1, 'Новое', 1994, 1), (2, 'Второе', 2000, 1)])
+        output = load(path=str(tmp_path), no_copy=no_copy)
+        assert 'already has titles' in output
+        assert Title.objects.get(pk=1).name == 'Старое'
+
+        load(path=str(tmp_path), no_copy=no_copy, upsert=True)
+        assert dict(Title.objects.values_list('pk', 'name')) == {
+            1: 'Новое', 2: 'Второе'}, (
+            'Проверьте, что --upsert обновляет строки по id и добавляет новые'
+        )
+        assert Category.objects.count() == 1
+
+    def test_unexpected_columns(self, tmp_path):
+        write_csv(tmp_path, 'genre.csv', [
+            ('id', 'name', 'slug', 'color'), (1, 'Драма', 'drama', 'red')])
+        with pytest.raises(CommandError, match='unexpected columns'):
+            load(path=str(tmp_path))
+
+    def test_missing_id_column(self, tmp_path):
+        write_csv(tmp_path, 'genre.csv', [
+            ('name', 'slug'), ('Драма', 'drama')])
+        with pytest.raises(CommandError, match='missing id column'):
+            load(path=str(tmp_path))
@@ -0,0 +1,133 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Q
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def rated(title, category, genre, user, another_user, settings):
+    """Titles with two 10s, a single 10, a single 2 and no reviews."""
+    from reviews.models import Review
+    from titles.models import Title
+
+    settings.RATING_PRIOR_WEIGHT = 1
+    single = Title.objects.create(name='Один отзыв', year=2000,
+                                  category=category)
+    low = Title.objects.create(name='Один низкий', year=2000,
+                               category=category)
+    Title.objects.create(name='Без отзывов', year=2000, category=category)
+    Review.objects.create(title=single, author=user, text='t', score=10)
+    Review.objects.create(title=low, author=user, text='t', score=2)
+    Review.objects.create(title=title, author=user, text='t', score=10)
+    Review.objects.create(
+        title=title, author=another_user, text='t', score=10)
+    return {'title': title, 'single': single, 'low': low}
+
+
+def board(url):
+    return [(entry['position'], entry['title']['id'])
+            for entry in APIClient().get(url).json()['results']]
+
+
+@pytest.mark.django_db
+class TestTopLeaderboard:
+
+    def test_ranked_by_bayesian_rating(self, rated):
+        call_command('refresh_leaderboards', verbosity=0)
+        # Prior mean is 32 / 4, a single 10 is worth less than two.
+        assert board('/api/v1/leaderboards/top/') == [
+            (1, rated['title'].id), (2, rated['single'].id),
+            (3, rated['low'].id),
+        ], (
+            'Проверьте, что лучшие произведения упорядочены по '
+            'байесовскому рейтингу, а произведения без отзывов пропущены'
+        )
+        response = APIClient().get('/api/v1/leaderboards/top/')
+        assert response.json()['results'][0]['score'] == 9.33
+        assert response.json()['results'][0]['title']['rating'] == 10
+
+    def test_scopes(self, rated):
+        call_command('refresh_leaderboards', verbosity=0)
+        assert board('/api/v1/leaderboards/top/?genre=drama') == [
+            (1, rated['title'].id)]
+        assert board('/api/v1/leaderboards/top/?category=movie') == [
+            (1, rated['title'].id), (2, rated['single'].id),
+            (3, rated['low'].id)]
+        assert board('/api/v1/leaderboards/top/?year=2000') == [
+            (1, rated['single'].id), (2, rated['low'].id)]
+        assert board('/api/v1/leaderboards/top/?year=1900') == []
+
+    def test_read_with_one_query(self, rated):
+        call_command('refresh_leaderboards', verbosity=0)
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/api/v1/leaderboards/top/?genre=drama')
+        assert response.status_code == 200
+        assert len(queries) == 1, (
+            'Проверьте, что рейтинг читается одним запросом'
+        )
+
+    def test_refresh_replaces_board(self, rated, settings):
+        settings.LEADERBOARD_SIZE = 1
+        call_command('refresh_leaderboards', verbosity=0)
+        call_command('refresh_leaderboards', verbosity=0)
+        assert board('/api/v1/leaderboards/top/') == [(1, rated['title'].id)]
+
+    def test_loop(self, rated, settings, monkeypatch):
+        from core.management.commands import refresh_leaderboards
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            settings.LEADERBOARD_SIZE = 1
+            if len(sleeps) == 2:
+                raise KeyboardInterrupt
+
+        monkeypatch.setattr(refresh_leaderboards.time, 'sleep', sleep)
+        with pytest.raises(KeyboardInterrupt):
+            call_command(
+                'refresh_leaderboards', loop=True, interval=30, verbosity=0)
+        assert sleeps == [30, 30], (
+            'Проверьте, что с --loop рейтинги пересчитываются '
+            'каждые --interval секунд'
+        )
+        assert board('/api/v1/leaderboards/top/') == [(1, rated['title'].id)]
+
+    def test_bad_requests(self, db):
+        client = APIClient()
+        assert client.get('/api/v1/leaderboards/worst/').status_code == 404
+        response = client.get('/api/v1/leaderboards/top/?genre=a&year=1')
+        assert response.status_code == 400
+
+
+@pytest.mark.django_db
+class TestTrendingLeaderboard:
+
+    def test_recent_reviews_weigh_more(self, rated, admin):
+        # Two reviews six days (three half-lives) old against a new one.
+        from reviews.models import Review
+        from titles.models import LeaderboardEntry
+
+        now = timezone.now()
+        Review.objects.filter(title=rated['title']).update(
+            pub_date=now - timedelta(days=6))
+        Review.objects.create(
+            title=rated['title'], author=admin, text='t', score=1)
+        Review.objects.filter(
+            Q(author=admin) | Q(title=rated['low'])
+        ).update(pub_date=now - timedelta(days=8))
+        call_command('refresh_leaderboards', board=['trending'], verbosity=0)
+        assert board('/api/v1/leaderboards/trending/') == [
+            (1, rated['single'].id), (2, rated['title'].id)
+        ], (
+            'Проверьте, что свежие отзывы весят больше старых, а отзывы '
+            'старше недели не учитываются'
+        )
+        assert not LeaderboardEntry.objects.filter(board='top').exists()
+        data = APIClient().get('/api/v1/leaderboards/trending/').json()
+        assert data['results'][1]['score'] == pytest.approx(0.25, abs=0.01)
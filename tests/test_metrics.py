@@ -0,0 +1,40 @@
+import re
+
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.mark.django_db
+class TestRequestMetrics:
+
+    def test_server_timing_header(self, title):
+        response = APIClient().get(f'/api/v1/titles/{title.id}/')
+        assert re.fullmatch(
+            r'db;desc="\d+ queries";dur=[\d.]+, render;dur=[\d.]+, '
+            r'total;dur=[\d.]+',
+            response['Server-Timing']
+        ), 'Проверьте, что ответ содержит заголовок Server-Timing'
+
+    def test_metrics_endpoint(self, title, admin_client):
+        from api.metrics import registry
+
+        registry.clear()
+        client = APIClient()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        response = admin_client.get('/api/v1/metrics/')
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        assert ('api_request_duration_seconds_count{route="title-list"} 2'
+                in text)
+        assert ('api_request_queries_bucket{route="title-list",le="+Inf"} 2'
+                in text)
+        assert ('api_cache_requests_total{namespace="title",outcome="hit"}'
+                in text)
+
+    def test_metrics_admin_only(self, user):
+        client = APIClient()
+        assert client.get('/api/v1/metrics/').status_code == 401
+        client.force_authenticate(user)
+        assert client.get('/api/v1/metrics/').status_code == 403
@@ -0,0 +1,101 @@
+from unittest import mock
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.utils import timezone
+
+
+@pytest.fixture
+def locmem_email(settings):
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+@pytest.mark.django_db
+class TestOutbox:
+
+    def test_signup_only_enqueues(self, client, locmem_email):
+        from core.models import OutboxEmail
+
+        response = client.post('/api/v1/auth/signup/', data={
+            'username': 'newbie', 'email': 'newbie@yamdb.fake'
+        })
+        assert response.status_code == 200
+        assert mail.outbox == [], (
+            'Проверьте, что при регистрации письмо не отправляется в запросе'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.to == 'newbie@yamdb.fake'
+        assert email.status == OutboxEmail.PENDING
+
+    def test_worker_sends_batch(self, client, locmem_email):
+        from core.models import OutboxEmail
+
+        for name in ('first', 'second'):
+            client.post('/api/v1/auth/signup/', data={
+                'username': name, 'email': f'{name}@yamdb.fake'
+            })
+        with mock.patch(
+            'core.management.commands.send_outbox.get_connection',
+            wraps=mail.get_connection
+        ) as get_connection:
+            call_command('send_outbox')
+        assert get_connection.call_count == 1, (
+            'Проверьте, что пачка писем отправляется через одно соединение'
+        )
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            'first@yamdb.fake', 'second@yamdb.fake']
+        assert 'confirmation_code' in mail.outbox[0].body
+        assert not OutboxEmail.objects.exclude(
+            status=OutboxEmail.SENT).exists()
+        assert not OutboxEmail.objects.exclude(body='').exists(), (
+            'Проверьте, что код подтверждения не хранится после отправки'
+        )
+
+    def test_retry_with_backoff(self, user, locmem_email, settings):
+        from core.models import OutboxEmail
+
+        settings.OUTBOX_MAX_ATTEMPTS = 2
+        settings.OUTBOX_RETRY_DELAY = 10
+        email = OutboxEmail.objects.create(
+            subject='s', body='b', from_email='admin@yamdb.com', to='x@x.x')
+        with mock.patch('django.core.mail.EmailMessage.send',
+                        side_effect=OSError('down')):
+            call_command('send_outbox')
+            email.refresh_from_db()
+            assert email.status == OutboxEmail.PENDING
+            assert email.attempts == 1
+            assert 'down' in email.last_error
+            assert email.next_attempt_at > timezone.now()
+
+            call_command('send_outbox')
+            email.refresh_from_db()
+            assert email.attempts == 1, (
+                'Проверьте, что письмо не отправляется до следующей попытки'
+            )
+
+            OutboxEmail.objects.update(next_attempt_at=timezone.now())
+            call_command('send_outbox')
+            email.refresh_from_db()
+            assert email.status == OutboxEmail.FAILED
+            assert email.attempts == 2
+            assert email.body == ''
+        assert mail.outbox == []
+
+    def test_connection_failure_backs_off(self, user, locmem_email):
+        from core.models import OutboxEmail
+
+        email = OutboxEmail.objects.create(
+            subject='s', body='b', from_email='admin@yamdb.com', to='x@x.x')
+        with mock.patch(
+            'django.core.mail.backends.locmem.EmailBackend.open',
+            side_effect=ConnectionRefusedError('refused'), create=True
+        ):
+            call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что ошибка подключения к почтовому серверу '
+            'записывается как неудачная попытка'
+        )
+        assert 'refused' in email.last_error
+        assert email.next_attempt_at > timezone.now()
@@ -0,0 +1,80 @@
+import base64
+import json
+
+import pytest
+from rest_framework.test import APIClient
+
+
+def walk(url):
+    client = APIClient()
+    items = []
+    while url:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'count' not in response.data, (
+            'Проверьте, что в режиме курсора количество по умолчанию '
+            'не считается'
+        )
+        items.extend(response.data['results'])
+        url = response.data['next']
+    return items
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_titles_cursor(self, catalogue):
+        items = walk('/api/v1/titles/?pagination=cursor&limit=7')
+        ids = [item['id'] for item in items]
+        assert len(ids) == 30
+        assert ids == sorted(ids)
+
+    def test_reviews_cursor(self, catalogue):
+        title_id = catalogue['title'].id
+        items = walk(
+            f'/api/v1/titles/{title_id}/reviews/?pagination=cursor&limit=4')
+        keys = [(item['pub_date'], item['id']) for item in items]
+        assert len(set(keys)) == 30
+        assert keys == sorted(keys)
+
+    def test_comments_cursor(self, catalogue):
+        url = (f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+               f'{catalogue["review"].id}/comments/?pagination=cursor&limit=8')
+        keys = [(item['pub_date'], item['id']) for item in walk(url)]
+        assert len(set(keys)) == 30
+        assert keys == sorted(keys, reverse=True)
+
+    def test_invalid_cursor(self, catalogue):
+        response = APIClient().get('/api/v1/titles/?cursor=broken')
+        assert response.status_code == 404
+
+    @pytest.mark.parametrize('position', [
+        ['abc', 1], ['2024-13-45T00:00:00', 1], [None, 1],
+        ['2024-01-01T00:00:00+00:00', 'abc'], [{}, []],
+    ])
+    def test_invalid_cursor_values(self, catalogue, position):
+        cursor = base64.urlsafe_b64encode(json.dumps(position).encode())
+        url = (f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+               f'?cursor={cursor.decode()}')
+        assert APIClient().get(url).status_code == 404, (
+            'Проверьте, что курсор с неверными значениями даёт 404, а не 500'
+        )
+
+
+@pytest.mark.django_db
+class TestOffsetPagination:
+
+    def test_default_is_offset(self, catalogue):
+        response = APIClient().get('/api/v1/titles/?limit=10&offset=10')
+        assert response.data['count'] == 30
+        assert response.data['previous'] is not None
+        assert len(response.data['results']) == 10
+
+    def test_count_skipped(self, catalogue):
+        client = APIClient()
+        response = client.get('/api/v1/titles/?limit=20&count=none')
+        assert response.data['count'] is None
+        assert response.data['next'] is not None
+        response = client.get(response.data['next'])
+        assert len(response.data['results']) == 10
+        assert response.data['next'] is None
@@ -0,0 +1,93 @@
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+from django.db import connection
+
+
+class FakeConnection:
+
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(max_size=2, timeout=0.05):
+    from core.pool import ConnectionPool
+
+    return ConnectionPool('test', max_size, timeout,
+                          reset=lambda conn: not conn.closed)
+
+
+class TestConnectionPool:
+
+    def test_backend_loads_with_apps(self):
+        from django.conf import settings
+
+        env = dict(os.environ, DB_ENGINE='core.backends.pooled_postgresql',
+                   DJANGO_SETTINGS_MODULE='api_yamdb.settings')
+        result = subprocess.run(
+            [sys.executable, '-c', 'import django; django.setup()'],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True)
+        assert result.returncode == 0, (
+            'Проверьте, что движок с пулом соединений загружается вместе '
+            f'с приложениями: {result.stderr[-300:]}'
+        )
+
+    def test_reuses_released_connections(self):
+        pool = make_pool()
+        first = pool.getconn(FakeConnection)
+        pool.putconn(first)
+        assert pool.getconn(FakeConnection) is first
+        assert (pool.size, pool.checkouts) == (1, 2)
+
+    def test_waits_for_release_then_times_out(self):
+        from core.pool import PoolTimeout
+
+        pool = make_pool(max_size=1, timeout=1)
+        held = pool.getconn(FakeConnection)
+        threading.Timer(0.05, pool.putconn, (held,)).start()
+        assert pool.getconn(FakeConnection) is held, (
+            'Проверьте, что запрос соединения ждёт его освобождения'
+        )
+        pool.timeout = 0.05
+        with pytest.raises(PoolTimeout):
+            pool.getconn(FakeConnection)
+        assert pool.timeouts == 1
+        assert pool.wait_time.count == 2
+
+    def test_discarded_connection_frees_slot(self):
+        pool = make_pool(max_size=1)
+        conn = pool.getconn(FakeConnection)
+        pool.putconn(conn, discard=True)
+        assert conn.closed
+        assert pool.size == 0
+        assert pool.getconn(FakeConnection) is not conn
+
+
+@pytest.mark.django_db
+class TestPooledBackend:
+
+    def test_connection_returns_to_pool(self):
+        if connection.vendor != 'postgresql':
+            pytest.skip('Пул соединений работает только с PostgreSQL')
+        from core.backends.pooled_postgresql.base import DatabaseWrapper
+        from core.pool import render_metrics
+
+        wrapper = DatabaseWrapper(
+            {**connection.settings_dict, 'POOL_SIZE': 1}, alias='pooled')
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw = wrapper.connection
+        wrapper.close()
+        assert wrapper.pool.idle == [raw]
+        with wrapper.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        assert wrapper.connection is raw
+        wrapper.close()
+        assert 'db_pool_checkouts_total{pool="pooled:' in render_metrics()
+        wrapper.pool.close_idle()
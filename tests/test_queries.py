@@ -0,0 +1,46 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def count_queries(url):
+    client = APIClient()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200, (
+        f'Проверьте, что GET-запрос к `{url}` возвращает статус 200'
+    )
+    return len(context.captured_queries)
+
+
+@pytest.mark.django_db
+class TestQueryCount:
+    """Query count of a list endpoint must not depend on the page size."""
+
+    @pytest.mark.parametrize('url, expected', [
+        ('/api/v1/titles/', 3),
+        ('/api/v1/genres/', 2),
+        ('/api/v1/categories/', 2),
+    ])
+    def test_catalogue(self, catalogue, url, expected):
+        for limit in (1, 10, 30):
+            assert count_queries(f'{url}?limit={limit}') == expected, (
+                f'Проверьте, что `{url}` выполняет {expected} запроса '
+                f'к БД при limit={limit}'
+            )
+
+    def test_title_detail(self, catalogue):
+        url = f'/api/v1/titles/{catalogue["title"].id}/'
+        assert count_queries(url) == 2
+
+    def test_reviews(self, catalogue):
+        url = f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+        for limit in (1, 10, 30):
+            assert count_queries(f'{url}?limit={limit}') == 3
+
+    def test_comments(self, catalogue):
+        url = (f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+               f'{catalogue["review"].id}/comments/')
+        for limit in (1, 10, 30):
+            assert count_queries(f'{url}?limit={limit}') == 3
@@ -0,0 +1,54 @@
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestTitleRating:
+
+    def test_rating_follows_review_writes(self, title, user, another_user):
+        from reviews.models import Review
+
+        assert title.rating is None, (
+            'Проверьте, что у произведения без отзывов нет рейтинга'
+        )
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='text', score=5)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (15, 2)
+        assert title.rating == 7
+
+        review.score = 1
+        review.save()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (6, 2)
+
+        review.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (5, 1)
+
+    def test_rating_follows_cascade_delete(self, title, user):
+        from reviews.models import Review
+
+        Review.objects.create(title=title, author=user, text='text', score=8)
+        user.delete()
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (0, 0)
+
+    def test_refresh_ratings_command(self, title, user, another_user):
+        from reviews.models import Review
+        from titles.models import Title
+
+        Review.objects.bulk_create([
+            Review(title=title, author=user, text='text', score=3),
+            Review(title=title, author=another_user, text='text', score=4),
+        ])
+        title.refresh_from_db()
+        assert title.rating_count == 0, (
+            'bulk_create не вызывает сигналы, рейтинг не должен измениться'
+        )
+        call_command('refresh_ratings', verbosity=0)
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (7, 2)
+        assert Title.objects.refresh_ratings() == 0
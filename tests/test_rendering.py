@@ -0,0 +1,83 @@
+import gzip
+import json
+
+import brotli
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import ORJSONRenderer
+
+
+@pytest.mark.django_db
+class TestRendering:
+
+    def test_orjson_output_is_identical(self, catalogue):
+        response = APIClient().get('/api/v1/titles/?limit=30')
+        assert (ORJSONRenderer().render(response.data)
+                == JSONRenderer().render(response.data)), (
+            'Проверьте, что быстрый рендерер выдаёт те же байты'
+        )
+        assert response.content == JSONRenderer().render(response.data)
+
+    @pytest.mark.parametrize('encoding, decompress', (
+        ('br', brotli.decompress),
+        ('gzip', gzip.decompress),
+    ))
+    def test_compression(self, catalogue, encoding, decompress):
+        client = APIClient()
+        plain = client.get('/api/v1/titles/')
+        response = client.get(
+            '/api/v1/titles/', HTTP_ACCEPT_ENCODING=f'{encoding}, identity')
+        assert response['Content-Encoding'] == encoding, (
+            f'Проверьте, что ответ сжимается методом {encoding}'
+        )
+        assert decompress(response.content) == plain.content
+        assert 'Accept-Encoding' in response['Vary']
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+
+    def test_titles(self, catalogue):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(
+                '/api/v1/titles/?fields=id,name,rating')
+        assert response.status_code == 200
+        for item in response.json()['results']:
+            assert set(item) == {'id', 'name', 'rating'}, (
+                'Проверьте, что возвращаются только запрошенные поля'
+            )
+        page_sql = queries.captured_queries[-1]['sql']
+        assert 'description' not in page_sql, (
+            'Проверьте, что запрос выбирает только нужные столбцы'
+        )
+        assert not any('titles_genretitle' in query['sql']
+                       for query in queries.captured_queries)
+
+    def test_nested_object_columns(self, catalogue):
+        response = APIClient().get('/api/v1/titles/?fields=name,category')
+        assert response.json()['results'][0]['category'] == {
+            'name': 'Фильм', 'slug': 'movie'}
+
+    def test_cursor_pages(self, catalogue):
+        url = (f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+               '?pagination=cursor&limit=5&fields=id,score')
+        client = APIClient()
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        expected = len(queries)
+        next_page = client.get(response.json()['next'])
+        assert next_page.status_code == 200
+        assert set(next_page.json()['results'][0]) == {'id', 'score'}
+        with CaptureQueriesContext(connection) as queries:
+            client.get(url)
+        assert len(queries) == expected, (
+            'Проверьте, что столбцы сортировки не догружаются по одному'
+        )
+
+    def test_unknown_field(self, catalogue):
+        response = APIClient().get('/api/v1/genres/?fields=name,secret')
+        assert response.status_code == 400
@@ -0,0 +1,75 @@
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import router
+from django.http import HttpResponse
+from django.test import RequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api.middleware import ReplicaMiddleware
+from titles.models import Title
+
+
+def get_response(request):
+    """Answers with the database the router picks for reads."""
+    return HttpResponse(router.db_for_read(Title))
+
+
+def call(method, user=None, status=200, authorization=None):
+    def respond(request):
+        request.user = user or AnonymousUser()
+        response = get_response(request)
+        response.status_code = status
+        return response
+
+    headers = {}
+    if user is not None:
+        token = RefreshToken.for_user(user).access_token
+        headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    if authorization is not None:
+        headers['HTTP_AUTHORIZATION'] = authorization
+    request = getattr(RequestFactory(), method)('/api/v1/titles/', **headers)
+    return ReplicaMiddleware(respond)(request).content.decode()
+
+
+@pytest.mark.django_db
+class TestReplicaRouting:
+
+    @pytest.fixture(autouse=True)
+    def replicas(self, settings):
+        settings.DATABASE_REPLICAS = ['replica_1']
+
+    def test_safe_request_reads_replica(self):
+        assert call('get') == 'replica_1', (
+            'Проверьте, что GET-запросы читают из реплики'
+        )
+
+    def test_unsafe_request_reads_primary(self, user):
+        assert call('post', user) == 'default', (
+            'Проверьте, что изменяющие запросы читают из основной базы'
+        )
+
+    def test_writer_sticks_to_primary(self, user, another_user):
+        assert call('get', user) == 'replica_1'
+        call('post', user)
+        assert call('get', user) == 'default', (
+            'Проверьте, что автор изменений читает из основной базы'
+        )
+        assert call('get', another_user) == 'replica_1'
+
+    def test_malformed_header_reads_replica(self):
+        assert call('get', authorization='Bearer a b') == 'replica_1', (
+            'Проверьте, что запрос с неверным заголовком Authorization '
+            'считается анонимным'
+        )
+
+    def test_failed_write_does_not_stick(self, user):
+        call('post', user, status=400)
+        assert call('get', user) == 'replica_1'
+
+    def test_reads_outside_requests_use_primary(self):
+        assert router.db_for_read(Title) == 'default'
+
+
+@pytest.mark.django_db
+def test_without_replicas_reads_primary():
+    assert call('get') == 'default'
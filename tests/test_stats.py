@@ -0,0 +1,115 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def histogram(title):
+    title.refresh_from_db()
+    return {score: count for score, count in title.histogram.items()
+            if count}
+
+
+@pytest.mark.django_db
+class TestScoreHistogram:
+
+    def test_follows_review_writes(self, title, user, another_user):
+        from reviews.models import Review
+
+        review = Review.objects.create(
+            title=title, author=user, text='text', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='text', score=5)
+        assert histogram(title) == {10: 1, 5: 1}, (
+            'Проверьте, что гистограмма оценок обновляется при создании '
+            'отзыва'
+        )
+        review.score = 5
+        review.save()
+        assert histogram(title) == {5: 2}
+        review.delete()
+        assert histogram(title) == {5: 1}
+
+    def test_refresh_ratings_fixes_histogram(self, title, user):
+        from reviews.models import Review
+        from titles.models import Title
+
+        Review.objects.bulk_create(
+            [Review(title=title, author=user, text='text', score=3)])
+        assert histogram(title) == {}
+        assert Title.objects.refresh_ratings() == 1
+        assert histogram(title) == {3: 1}
+
+    def test_title_stats(self, title, user, another_user, settings):
+        from reviews.models import Review
+
+        settings.RATING_PRIOR_WEIGHT = 2
+        Review.objects.create(title=title, author=user, text='t', score=10)
+        Review.objects.create(
+            title=title, author=another_user, text='t', score=7)
+        client = APIClient()
+        url = f'/api/v1/titles/{title.id}/stats/'
+        client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        assert len(queries) == 1, (
+            'Проверьте, что статистика читается одним запросом'
+        )
+        data = response.json()
+        assert data['count'] == 2
+        assert data['average'] == 8.5
+        assert data['rating'] == 8
+        assert data['bayesian_rating'] == 8.5
+        assert data['histogram']['10'] == 1 and data['histogram']['1'] == 0
+
+    def test_missing_title(self, db):
+        assert APIClient().get('/api/v1/titles/0/stats/').status_code == 404
+
+
+@pytest.mark.django_db
+class TestRollups:
+
+    def test_refresh_stats(self, catalogue):
+        from titles.models import Title
+
+        call_command('refresh_stats', verbosity=0)
+        titles = Title.objects.filter(genre__slug='drama')
+        expected = sum(title.rating_count for title in titles)
+        response = APIClient().get('/api/v1/genres/drama/stats/')
+        assert response.status_code == 200
+        data = response.json()
+        assert data['titles_count'] == titles.count()
+        assert data['count'] == expected, (
+            'Проверьте, что статистика жанра суммирует его произведения'
+        )
+        assert sum(data['histogram'].values()) == expected
+        response = APIClient().get('/api/v1/categories/movie/stats/')
+        assert response.json()['titles_count'] == Title.objects.filter(
+            category__slug='movie').count()
+
+    def test_loop(self, genre, title, user, monkeypatch):
+        from core.management.commands import refresh_stats
+        from reviews.models import Review
+
+        sleeps = []
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 2:
+                raise KeyboardInterrupt
+            Review.objects.create(title=title, author=user, text='t', score=4)
+
+        monkeypatch.setattr(refresh_stats.time, 'sleep', sleep)
+        with pytest.raises(KeyboardInterrupt):
+            call_command('refresh_stats', loop=True, interval=30, verbosity=0)
+        assert sleeps == [30, 30]
+        data = APIClient().get(f'/api/v1/genres/{genre.slug}/stats/').json()
+        assert data['count'] == 1, (
+            'Проверьте, что с --loop статистика пересчитывается '
+            'каждые --interval секунд'
+        )
+
+    def test_before_refresh(self, genre):
+        data = APIClient().get(f'/api/v1/genres/{genre.slug}/stats/').json()
+        assert data['count'] == 0 and data['average'] is None
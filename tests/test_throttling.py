@@ -0,0 +1,119 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+
+def signup(client, username, address='10.0.0.1', **extra):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': username, 'email': f'{username}@yamdb.fake'
+    }, REMOTE_ADDR=address, **extra)
+
+
+class TestRateWindow:
+
+    def test_window_then_reset(self):
+        from api.throttling import count_request
+
+        key = 'test:window'
+        assert [count_request(key, 3, 60, now=1000) for _ in range(3)] == [
+            0, 0, 0]
+        assert count_request(key, 3, 60, now=1000) == pytest.approx(20), (
+            'Проверьте, что исчерпанный лимит сообщает время до нового окна'
+        )
+        assert [count_request(key, 3, 60, now=1020) for _ in range(3)] == [
+            0, 0, 0]
+        assert count_request(key, 3, 60, now=1020) == pytest.approx(60)
+
+    def test_concurrent_requests(self):
+        from api.throttling import count_request
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            waits = list(executor.map(
+                lambda _: count_request('test:threads', 10, 60, now=1000),
+                range(40)))
+        assert waits.count(0) == 10, (
+            'Проверьте, что одновременные запросы не превышают лимит'
+        )
+
+    def test_parse_rate(self):
+        from api.throttling import parse_rate
+
+        assert parse_rate('5/hour') == (5, 3600)
+        assert parse_rate('20/m') == (20, 60)
+
+
+@pytest.mark.django_db
+class TestThrottling:
+
+    def test_auth_rejected_without_queries(self, settings):
+        settings.THROTTLE_RATES = {'auth': '2/m'}
+        client = APIClient()
+        for name in ('first', 'second'):
+            assert signup(client, name).status_code == 200
+        with CaptureQueriesContext(connection) as queries:
+            response = signup(client, 'third')
+        assert response.status_code == 429
+        assert len(queries) == 0, (
+            'Проверьте, что лишние запросы отклоняются без обращения к базе'
+        )
+        assert int(response['Retry-After']) > 0
+        assert signup(client, 'third', '10.0.0.2').status_code == 200, (
+            'Проверьте, что лимит регистрации считается по адресу клиента'
+        )
+
+    def test_spoofed_forwarded_for(self, settings):
+        settings.THROTTLE_RATES = {'auth': '1/m'}
+        client = APIClient()
+        proxy = '172.18.0.2'
+        responses = [
+            signup(client, name, proxy,
+                   HTTP_X_FORWARDED_FOR=f'{forged}, 10.0.0.1').status_code
+            for name, forged in (('first', '1.1.1.1'), ('second', '2.2.2.2'))
+        ]
+        assert responses == [200, 429], (
+            'Проверьте, что адрес, подставленный клиентом в '
+            'X-Forwarded-For, не даёт новой квоты'
+        )
+        response = signup(client, 'third', proxy,
+                          HTTP_X_FORWARDED_FOR='10.0.0.2')
+        assert response.status_code == 200, (
+            'Проверьте, что клиенты за прокси получают отдельные квоты'
+        )
+
+    def test_confirmation_per_username(self, settings):
+        settings.THROTTLE_RATES = {'confirmation': '1/h'}
+        client = APIClient()
+        assert signup(client, 'newbie').status_code == 200
+        assert signup(client, 'NewBie', '10.0.0.2').status_code == 429, (
+            'Проверьте, что коды подтверждения ограничены для имени '
+            'пользователя с любого адреса'
+        )
+
+    def test_review_writes_per_user(self, settings, title, user,
+                                    another_user, admin):
+        settings.THROTTLE_RATES = {'reviews': '1/m', 'admin': '5/m'}
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        responses = {}
+        for author in (user, user, another_user, admin, admin):
+            client = APIClient()
+            client.force_authenticate(user=author)
+            response = client.post(url, data={'text': 't', 'score': 5})
+            responses.setdefault(author.username, []).append(
+                response.status_code)
+        assert responses[user.username] == [201, 429], (
+            'Проверьте, что запись отзывов ограничена для пользователя'
+        )
+        assert responses[another_user.username] == [201]
+        assert 429 not in responses[admin.username], (
+            'Проверьте, что у администраторов отдельный лимит'
+        )
+
+    def test_reads_not_throttled(self, settings, title):
+        settings.THROTTLE_RATES = {'write': '1/m', 'reviews': '1/m'}
+        client = APIClient()
+        for _ in range(3):
+            response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+            assert response.status_code == 200
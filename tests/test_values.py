@@ -0,0 +1,69 @@
+import pytest
+from rest_framework.test import APIClient
+
+
+@pytest.fixture
+def uncached(settings):
+    settings.RESPONSE_CACHE_TIMEOUT = 0
+    return settings
+
+
+def urls(catalogue):
+    title, review = catalogue['title'], catalogue['review']
+    reviews = f'/api/v1/titles/{title.id}/reviews/'
+    comments = f'{reviews}{review.id}/comments/'
+    return (
+        '/api/v1/titles/?limit=30',
+        '/api/v1/titles/?fields=id,rating,genre',
+        '/api/v1/titles/?genre=drama&pagination=cursor',
+        '/api/v1/titles/?search=Побег',
+        f'{reviews}?limit=30',
+        f'{reviews}?pagination=cursor&limit=7&fields=author,score',
+        f'{comments}?limit=30',
+        f'{comments}?pagination=cursor&limit=3',
+    )
+
+
+@pytest.mark.django_db
+class TestValuesSerializers:
+
+    def test_output_is_identical(self, catalogue, uncached):
+        client = APIClient()
+        for url in urls(catalogue):
+            uncached.VALUES_SERIALIZERS = True
+            fast = client.get(url)
+            uncached.VALUES_SERIALIZERS = False
+            regular = client.get(url)
+            assert fast.status_code == regular.status_code == 200
+            assert fast.content == regular.content, (
+                f'Проверьте, что `{url}` отдаёт те же байты, '
+                'что и сериализатор моделей'
+            )
+
+    def test_cursor_pages(self, catalogue, uncached):
+        client = APIClient()
+        url = (f'/api/v1/titles/{catalogue["title"].id}/reviews/'
+               '?pagination=cursor&limit=7')
+        seen = []
+        while url:
+            page = client.get(url).json()
+            seen += [item['id'] for item in page['results']]
+            url = page['next']
+        assert len(seen) == len(set(seen)) == catalogue['title'].reviews.count()
+
+    def test_genres_in_assignment_order(self, catalogue, uncached):
+        from titles.models import GenreTitle
+
+        title = catalogue['title']
+        links = list(title.genretitle_set.order_by('-genre_id'))
+        GenreTitle.objects.filter(title=title).delete()
+        GenreTitle.objects.bulk_create(
+            GenreTitle(genre_id=link.genre_id, title=title) for link in links)
+        expected = [link.genre.slug for link in links]
+        client = APIClient()
+        for values in (True, False):
+            uncached.VALUES_SERIALIZERS = values
+            data = client.get(f'/api/v1/titles/{title.id}/').json()
+            assert [item['slug'] for item in data['genre']] == expected, (
+                'Проверьте, что жанры выводятся в порядке назначения'
+            )